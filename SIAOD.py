@@ -1,10 +1,9 @@
+import os
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-from tkinter import messagebox
-from tkinter import ttk
-import pandas as pd
-import random
-from datetime import datetime, timedelta
+from tkinter import filedialog, messagebox
+from schedule_engine import DAYS, ScheduleEngine, ScheduleRequest
+from schedule_worker import ScheduleJob
 
 class RouteScheduler:
     def __init__(self, root):
@@ -18,10 +17,11 @@ class RouteScheduler:
         self.shift_duration_a = 8
         self.shift_duration_b = 12
         self.travel_duration_minutes = 60
+        self.network_lines = []
         self.workday_start = '06:00'
         self.workday_end = '03:00'
-        self.theme_style = tb.Style()
-        self.theme_style.theme_use('superhero')
+        self.active_job = None
+        self.schedule_cache = None
         self.primary_frame = tb.Frame(self.root)
         self.primary_frame.pack(fill=BOTH, expand=True)
         self.build_navigation_panel()
@@ -34,377 +34,291 @@ class RouteScheduler:
         self.status_label = tb.Label(self.root, text="", font=("Helvetica", 14), bootstyle=INFO)
         self.status_label.pack(pady=10)
     
-    def is_weekend(self, selected_day):
-        return selected_day in ['Суббота', 'Воскресенье']
-    
-    def calculate_route_completion(self, start_time, route_time):
-        start_time_obj = datetime.strptime(start_time, "%H:%M")
-        end_time_obj = start_time_obj + timedelta(minutes=route_time)
-        return end_time_obj.strftime("%H:%M")
-    
-    def standardize_time_interval(self, start_str, end_str):
-        start = datetime.strptime(start_str, "%H:%M")
-        end = datetime.strptime(end_str, "%H:%M")
-        if end < start:
-            end += timedelta(days=1)
-        return start, end
-    
-    def detect_time_overlap(self, start_time, end_time, busy_times):
-        s, e = self.standardize_time_interval(start_time, end_time)
-        for (bs, be) in busy_times:
-            b_s, b_e = self.standardize_time_interval(bs, be)
-            if s < b_e and e > b_s:
-                return True
-        return False
-    
-    def find_free_periods(self, driver_busy_times, route_time, break_time):
-        free_slots = []
-        for driver, periods in driver_busy_times.items():
-            normalized_periods = []
-            for (st, ft) in periods:
-                s_t, f_t = self.standardize_time_interval(st, ft)
-                normalized_periods.append((s_t, f_t))
-            normalized_periods.sort(key=lambda x: x[0])
-            current = datetime.strptime("06:00", "%H:%M")
-            work_end = datetime.strptime("03:00", "%H:%M") + timedelta(days=1)
-            for (st, et) in normalized_periods:
-                if (st - current).total_seconds() / 60 >= route_time + break_time:
-                    free_slots.append((current.strftime("%H:%M"), st.strftime("%H:%M")))
-                current = et
-            if (work_end - current).total_seconds() / 60 >= route_time + break_time:
-                free_slots.append((current.strftime("%H:%M"), work_end.strftime("%H:%M")))
-        return free_slots
-    
-    def calculate_additional_driver_needs(self, num_routes, driver_list, shift_duration):
-        max_routes_per_driver = int(shift_duration * 60 / self.travel_duration_minutes)
-        required_drivers = (num_routes + max_routes_per_driver - 1) // max_routes_per_driver
-        if len(driver_list) >= required_drivers:
-            return 0
-        else:
-            return required_drivers - len(driver_list)
+    def make_schedule_request(self, num_routes):
+        return ScheduleRequest(
+            type_a_drivers=list(self.type_a_drivers),
+            type_b_drivers=list(self.type_b_drivers),
+            num_routes=num_routes,
+            travel_duration_minutes=self.travel_duration_minutes,
+            selected_day=self.selected_day_var.get(),
+            shift_duration_a=self.shift_duration_a,
+            shift_duration_b=self.shift_duration_b,
+            route_options=list(self.route_options)
+        )
     
-    def can_assign_route(self, candidate_start_time, route_time, driver, driver_busy_times, driver_worked_hours, driver_route_counts, min_break_time):
-        candidate_end_time = self.calculate_route_completion(candidate_start_time, route_time)
-        if self.detect_time_overlap(candidate_start_time, candidate_end_time, driver_busy_times[driver]):
-            return False
-        if driver_busy_times[driver]:
-            last_start, last_end = driver_busy_times[driver][-1]
-            last_end_obj = datetime.strptime(last_end, "%H:%M")
-            last_start_obj = datetime.strptime(last_start, "%H:%M")
-            if last_end_obj < last_start_obj:
-                last_end_obj += timedelta(days=1)
-            candidate_start_obj = datetime.strptime(candidate_start_time, "%H:%M")
-            if candidate_start_obj < last_end_obj:
-                return False
-            if (candidate_start_obj - last_end_obj).total_seconds() / 60 < min_break_time:
-                return False
-        worked_hours = driver_worked_hours[driver]
-        if driver in self.type_a_drivers and worked_hours >= self.shift_duration_a:
-            return False
-        if driver in self.type_b_drivers and worked_hours >= self.shift_duration_b:
-            return False
-        candidate_end_obj = datetime.strptime(candidate_end_time, "%H:%M")
-        if candidate_end_obj < datetime.strptime(candidate_start_time, "%H:%M"):
-            candidate_end_obj += timedelta(days=1)
-        end_work_obj = datetime.strptime("03:00", "%H:%M") + timedelta(days=1)
-        if candidate_end_obj > end_work_obj:
-            return False
-        return True
-    
-    def allocate_driver_to_route(self, route_time, break_time, min_break_time, driver_list, driver_busy_times, driver_worked_hours, selected_day, driver_route_counts):
-        for _ in range(50):
-            free_slots = self.find_free_periods(driver_busy_times, route_time, break_time)
-            if not free_slots:
-                return None
-            slot_start, slot_end = random.choice(free_slots)
-            slot_start_obj = datetime.strptime(slot_start, "%H:%M")
-            slot_end_obj = datetime.strptime(slot_end, "%H:%M")
-            if slot_end_obj < slot_start_obj:
-                slot_end_obj += timedelta(days=1)
-            max_start = (slot_end_obj - slot_start_obj).total_seconds() / 60 - route_time
-            if max_start < 0:
-                continue
-            offset = random.randint(0, int(max_start))
-            candidate_start_obj = slot_start_obj + timedelta(minutes=offset)
-            candidate_start = candidate_start_obj.strftime("%H:%M")
-            random.shuffle(driver_list)
-            for driver in driver_list:
-                if driver in self.type_a_drivers and self.is_weekend(selected_day):
-                    continue
-                if self.can_assign_route(candidate_start, route_time, driver, driver_busy_times, driver_worked_hours, driver_route_counts, min_break_time):
-                    return (driver, candidate_start)
-        return None
-    
-    def generate_genetic_schedule_attempt(self, driver_list, shift_duration, num_routes, selected_day, break_time=10, min_break_time=30):
-        available_drivers = list(driver_list)
-        random.shuffle(available_drivers)
-        driver_busy_times = {driver: [] for driver in available_drivers}
-        driver_worked_hours = {driver: 0 for driver in available_drivers}
-        driver_route_counts = {driver: 0 for driver in available_drivers}
-        schedule = []
-        start_time = datetime.strptime("06:00", "%H:%M")
-        end_work_time = datetime.strptime("03:00", "%H:%M") + timedelta(days=1)
-        for _ in range(num_routes):
-            placed = False
-            candidate_start_time = start_time
-            candidate_end_time = candidate_start_time + timedelta(minutes=self.travel_duration_minutes)
-            if candidate_end_time > end_work_time:
-                route_type_selected = random.choice(self.route_options)
-                route_type = f"{route_type_selected} (доп рейс)"
-            else:
-                route_type = random.choice(self.route_options)
-            for driver in available_drivers:
-                if self.can_assign_route(candidate_start_time.strftime("%H:%M"), self.travel_duration_minutes, driver, driver_busy_times, driver_worked_hours, driver_route_counts, min_break_time):
-                    schedule.append({
-                        'Водитель': driver,
-                        'Тип маршрута': route_type,
-                        'Время начала': candidate_start_time.strftime("%H:%M"),
-                        'Время окончания': candidate_end_time.strftime("%H:%M"),
-                        'Маршрутов за смену': driver_route_counts[driver] + 1
-                    })
-                    driver_busy_times[driver].append((candidate_start_time.strftime("%H:%M"), candidate_end_time.strftime("%H:%M")))
-                    driver_route_counts[driver] += 1
-                    driver_worked_hours[driver] += self.travel_duration_minutes / 60
-                    placed = True
-                    break
-            if not placed:
-                break
-            start_time = candidate_end_time + timedelta(minutes=break_time)
-            if start_time >= end_work_time:
-                start_time = datetime.strptime("06:00", "%H:%M")
-                route_type = f"{random.choice(self.route_options)} (доп рейс)"
-        return schedule, len(schedule)
-    
-    def assess_schedule_quality(self, schedule):
-        return len(schedule)
-    
-    def execute_crossover(self, parent1, parent2):
-        if not parent1 or not parent2:
-            return parent1, parent2
-        crossover_point = len(parent1) // 2
-        child1 = parent1[:crossover_point] + parent2[crossover_point:]
-        child2 = parent2[:crossover_point] + parent1[crossover_point:]
-        return child1, child2
-    
-    def execute_mutation(self, schedule, driver_list, break_time=10):
-        if not schedule:
-            return schedule
-        mutated_schedule = schedule.copy()
-        mutation_point = random.randint(0, len(mutated_schedule) - 1)
-        new_driver = random.choice(driver_list)
-        mutated_schedule[mutation_point]['Водитель'] = new_driver
-        if random.random() < 0.5:
-            original_start = mutated_schedule[mutation_point]['Время начала']
-            original_end = mutated_schedule[mutation_point]['Время окончания']
-            try:
-                start_obj = datetime.strptime(original_start, "%H:%M") + timedelta(minutes=random.randint(-15, 15))
-                end_obj = datetime.strptime(original_end, "%H:%M") + timedelta(minutes=random.randint(-15, 15))
-                mutated_schedule[mutation_point]['Время начала'] = start_obj.strftime("%H:%M")
-                mutated_schedule[mutation_point]['Время окончания'] = end_obj.strftime("%H:%M")
-            except ValueError:
-                pass
-        return mutated_schedule
-    
-    def display_generated_timetable(self, result_window, schedule_df, title_text="Итоговое расписание"):
+    def display_generated_timetable(self, result_window, schedule, title_text="Итоговое расписание"):
         result_window.title(title_text)
-        if not schedule_df.empty:
-            frame = tb.Frame(result_window)
-            frame.pack(fill='both', expand=True, padx=20, pady=20)
-            scrollbar = ttk.Scrollbar(frame, orient="vertical")
-            scrollbar.pack(side='right', fill='y')
-            columns = list(schedule_df.columns)
-            tree = ttk.Treeview(frame, columns=columns, show='headings', yscrollcommand=scrollbar.set)
-            for col in columns:
-                tree.heading(col, text=col)
-                tree.column(col, width=150, anchor='center')
-            for index, row in schedule_df.iterrows():
-                tree.insert("", "end", values=list(row))
-            scrollbar.config(command=tree.yview)
-            tree.pack(fill='both', expand=True)
+        if schedule:
+            from timetable_view import VirtualTimetable
+            timetable = VirtualTimetable(result_window, schedule)
+            timetable.pack(fill='both', expand=True, padx=20, pady=20)
+            export_button = tb.Button(result_window, text="Сохранить расписание", command=lambda: self.export_generated_timetable(schedule), bootstyle=INFO, width=25)
+            export_button.pack(pady=(0, 20))
         else:
             message = "Не удалось сгенерировать расписание.\nНужно добавить водителей или уменьшить число рейсов."
             messagebox.showerror("Ошибка", message)
     
-    def build_optimized_timetable(self, driver_list, shift_duration, num_routes, selected_day, parent_window, break_time=10, min_break_time=30):
-        additional_needed = self.calculate_additional_driver_needs(num_routes, driver_list, shift_duration)
-        if additional_needed > 0:
-            message = f"Нехватка сотрудников.\nНужно добавить ещё {additional_needed} водителей или уменьшить число рейсов."
-            messagebox.showerror("Ошибка", message)
+    def export_generated_timetable(self, schedule):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("Компактный формат", "*.scol")])
+        if not path:
+            return
+        from roster_io import export_schedule
+        try:
+            rows = export_schedule(path, schedule, self.selected_day_var.get())
+        except OSError as error:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить расписание:\n{error}")
+            return
+        self.refresh_main_status(f"Расписание сохранено ({rows} рейсов): {path}", SUCCESS)
+    
+    def show_schedule_result(self, result, parent_window):
+        if result.failure:
+            messagebox.showerror("Ошибка", result.failure)
+            if result.stats is not None:
+                stats_window = tb.Toplevel(parent_window)
+                stats_window.title("Статистика запуска")
+                self.display_run_stats(stats_window, result.stats)
             return
-        schedule = []
-        driver_busy_times = {d: [] for d in driver_list}
-        driver_worked_hours = {d: 0 for d in driver_list}
-        driver_route_counts = {d: 0 for d in driver_list}
-        current_time = datetime.strptime("06:00", "%H:%M")
-        work_end = datetime.strptime("03:00", "%H:%M") + timedelta(days=1)
-        for _ in range(num_routes):
-            route_type = random.choice(self.route_options)
-            actual_time = self.travel_duration_minutes * 2 if 'обратно' in route_type else self.travel_duration_minutes
-            candidate_start_str = current_time.strftime("%H:%M")
-            candidate_end_str = self.calculate_route_completion(candidate_start_str, actual_time)
-            candidate_end_obj = datetime.strptime(candidate_end_str, "%H:%M")
-            if candidate_end_obj < current_time:
-                candidate_end_obj += timedelta(days=1)
-            if candidate_end_obj > work_end:
-                final_type = f"{route_type} (доп рейс)"
-                result = self.allocate_driver_to_route(actual_time, break_time, min_break_time, driver_list, driver_busy_times, driver_worked_hours, selected_day, driver_route_counts)
-                if result is None:
-                    message = "Расписание не утверждено.\nНужно добавить сотрудников или уменьшить число рейсов."
-                    messagebox.showerror("Ошибка", message)
-                    return
-                else:
-                    driver, slot_start = result
-                    cend = self.calculate_route_completion(slot_start, actual_time)
-                    worked_minutes = (datetime.strptime(cend, "%H:%M") - datetime.strptime(slot_start, "%H:%M")).seconds / 60
-                    schedule.append({
-                        'Водитель': driver,
-                        'Тип маршрута': final_type,
-                        'Время начала': slot_start,
-                        'Время окончания': cend,
-                        'Маршрутов за смену': driver_route_counts[driver] + 1
-                    })
-                    driver_busy_times[driver].append((slot_start, cend))
-                    driver_worked_hours[driver] += worked_minutes / 60
-            else:
-                placed = False
-                copy_drivers = list(driver_list)
-                random.shuffle(copy_drivers)
-                for driver in copy_drivers:
-                    if driver in self.type_a_drivers and self.is_weekend(selected_day):
-                        continue
-                    if self.can_assign_route(candidate_start_str, actual_time, driver, driver_busy_times, driver_worked_hours, driver_route_counts, min_break_time):
-                        worked_minutes = (candidate_end_obj - datetime.strptime(candidate_start_str, "%H:%M")).seconds / 60
-                        schedule.append({
-                            'Водитель': driver,
-                            'Тип маршрута': route_type,
-                            'Время начала': candidate_start_str,
-                            'Время окончания': candidate_end_str,
-                            'Маршрутов за смену': driver_route_counts[driver] + 1
-                        })
-                        driver_busy_times[driver].append((candidate_start_str, candidate_end_str))
-                        driver_route_counts[driver] += 1
-                        driver_worked_hours[driver] += worked_minutes / 60
-                        placed = True
-                        current_time = candidate_end_obj + timedelta(minutes=break_time + min_break_time)
-                        break
-                if not placed:
-                    result = self.allocate_driver_to_route(actual_time, break_time, min_break_time, driver_list, driver_busy_times, driver_worked_hours, selected_day, driver_route_counts)
-                    if result is None:
-                        message = "Расписание не утверждено.\nНужно добавить сотрудников или уменьшить число рейсов."
-                        messagebox.showerror("Ошибка", message)
-                        return
-                    else:
-                        driver, slot_start = result
-                        cend = self.calculate_route_completion(slot_start, actual_time)
-                        worked_minutes = (datetime.strptime(cend, "%H:%M") - datetime.strptime(slot_start, "%H:%M")).seconds / 60
-                        final_type = f"{route_type} (доп рейс)"
-                        schedule.append({
-                            'Водитель': driver,
-                            'Тип маршрута': final_type,
-                            'Время начала': slot_start,
-                            'Время окончания': cend,
-                            'Маршрутов за смену': driver_route_counts[driver] + 1
-                        })
-                        driver_busy_times[driver].append((slot_start, cend))
-                        driver_worked_hours[driver] += worked_minutes / 60
         result_window = tb.Toplevel(parent_window)
-        df = pd.DataFrame(schedule)
-        if not df.empty:
-            self.display_generated_timetable(result_window, df, "Итоговое расписание:")
-        else:
-            self.display_generated_timetable(result_window, pd.DataFrame(), "Расписание не сформировано.")
-    
-    def execute_genetic_algorithm(self, driver_list, shift_duration, num_routes, selected_day, generations=50, population_size=20, mutation_rate=0.1, break_time=10, min_break_time=30):
-        population = []
-        for _ in range(population_size):
-            schedule, score = self.generate_genetic_schedule_attempt(driver_list, shift_duration, num_routes, selected_day, break_time, min_break_time)
-            population.append({'schedule': schedule, 'fitness': self.assess_schedule_quality(schedule)})
-        best_schedule = None
-        best_fitness = -1
-        for _ in range(generations):
-            population = sorted(population, key=lambda x: x['fitness'], reverse=True)
-            current_best = population[0]
-            if current_best['fitness'] > best_fitness:
-                best_fitness = current_best['fitness']
-                best_schedule = current_best['schedule']
-            if best_fitness >= num_routes:
-                break
-            parents = population[:population_size // 2]
-            new_population = parents.copy()
-            while len(new_population) < population_size:
-                parent1, parent2 = random.sample(parents, 2)
-                child1_schedule, child2_schedule = self.execute_crossover(parent1['schedule'], parent2['schedule'])
-                child1 = {'schedule': child1_schedule, 'fitness': self.assess_schedule_quality(child1_schedule)}
-                child2 = {'schedule': child2_schedule, 'fitness': self.assess_schedule_quality(child2_schedule)}
-                new_population.extend([child1, child2])
-            for individual in new_population:
-                if random.random() < mutation_rate:
-                    mutated_schedule = self.execute_mutation(individual['schedule'], driver_list, break_time)
-                    individual['schedule'] = mutated_schedule
-                    individual['fitness'] = self.assess_schedule_quality(mutated_schedule)
-            population = new_population[:population_size]
-        result_window = tb.Toplevel(self.root)
-        if best_fitness >= num_routes:
-            title_text = "Генетический алгоритм завершен. Лучшее расписание"
-        else:
-            title_text = "Генетический алгоритм завершен. Лучшее найденное расписание"
-        if best_schedule and best_fitness > 0:
-            df = pd.DataFrame(best_schedule)
-            self.display_generated_timetable(result_window, df, f"{title_text} ({best_fitness} рейсов):")
-        else:
-            self.display_generated_timetable(result_window, pd.DataFrame(), title_text)
+        self.display_generated_timetable(result_window, result.schedule, result.title)
+        if result.stats is not None:
+            self.display_run_stats(result_window, result.stats)
+    
+    def display_run_stats(self, result_window, stats):
+        stats_frame = tb.Labelframe(result_window, text="Статистика запуска", bootstyle=INFO)
+        stats_frame.pack(fill='x', padx=20, pady=(0, 20))
+        summary = "\n".join(stats.summary_lines()) or "Нет данных."
+        tb.Label(stats_frame, text=summary, font=("Helvetica", 12), justify=LEFT).pack(side=LEFT, padx=10, pady=10)
+        export_button = tb.Button(stats_frame, text="Сохранить отчёт", command=lambda: self.export_run_stats(stats), bootstyle=INFO, width=20)
+        export_button.pack(side=RIGHT, padx=10, pady=10)
+    
+    def export_run_stats(self, stats):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not path:
+            return
+        stats.write(path)
+        self.refresh_main_status(f"Отчёт сохранён: {path}", SUCCESS)
+    
+    def run_with_stats(self, run, progress, cancel_event, stats):
+        if stats is None:
+            return run(progress, cancel_event, None)
+        with stats.timer('run.total'):
+            result = run(progress, cancel_event, stats)
+        result.stats = stats
+        return result
+    
+    def precheck_capacity(self, estimate):
+        if not estimate.ok:
+            messagebox.showerror("Ошибка", estimate.failure)
+            return False
+        self.refresh_main_status(estimate.summary(), INFO)
+        return True
+    
+    def get_schedule_cache(self):
+        if self.schedule_cache is None:
+            from schedule_cache import DEFAULT_CACHE_DIR, ScheduleCache
+            self.schedule_cache = ScheduleCache(directory=DEFAULT_CACHE_DIR)
+        return self.schedule_cache
+    
+    def nearest_cached_schedule(self, request):
+        return self.get_schedule_cache().nearest(request) if self.use_cache_var.get() else None
+    
+    def cached_schedule(self, request, engine_name):
+        if not self.use_cache_var.get():
+            return None
+        result = self.get_schedule_cache().get(request, engine_name)
+        if result is not None:
+            result.title = f"{result.title.rstrip(':')} (из кэша):"
+        return result
+    
+    def run_schedule_job(self, run, title_text, error_message, cache_key=None):
+        if self.active_job is not None:
+            self.refresh_main_status("Расписание уже формируется.", WARNING)
+            return
+        self.job_cache_key = cache_key if self.use_cache_var.get() else None
+        stats = None
+        if self.collect_stats_var.get():
+            from instrumentation import RunStats
+            stats = RunStats()
+        job = ScheduleJob(lambda progress, cancel_event: self.run_with_stats(run, progress, cancel_event, stats))
+        self.active_job = job
+        self.job_error_message = error_message
+        self.progress_window = tb.Toplevel(self.root)
+        self.progress_window.title(title_text)
+        self.progress_window.protocol("WM_DELETE_WINDOW", job.cancel)
+        self.progress_label = tb.Label(self.progress_window, text="Формирование расписания...", font=("Helvetica", 14))
+        self.progress_label.pack(padx=20, pady=10)
+        self.progress_bar = tb.Progressbar(self.progress_window, length=400, maximum=100, bootstyle=INFO)
+        self.progress_bar.pack(padx=20, pady=10)
+        cancel_button = tb.Button(self.progress_window, text="Отмена", command=job.cancel, bootstyle=WARNING, width=20)
+        cancel_button.pack(pady=10)
+        job.start()
+        self.root.after(100, self.poll_schedule_job)
+    
+    def poll_schedule_job(self):
+        job = self.active_job
+        done, total = job.progress
+        if total:
+            self.progress_bar.configure(value=100 * done / total)
+            self.progress_label.config(text=f"Выполнено: {done} из {total}")
+        if job.cancel_event.is_set():
+            self.progress_label.config(text="Отмена...")
+        if not job.is_done():
+            self.root.after(100, self.poll_schedule_job)
+            return
+        self.progress_window.destroy()
+        self.active_job = None
+        if job.error is not None:
+            messagebox.showerror("Ошибка", self.job_error_message)
+            return
+        if self.job_cache_key is not None:
+            self.get_schedule_cache().put(*self.job_cache_key, job.result)
+        self.show_schedule_result(job.result, self.root)
     
     def start_genetic_schedule(self):
         try:
             num_routes = int(self.total_routes_entry.get())
-            selected_day = self.selected_day_var.get()
-            all_drivers = self.type_a_drivers + self.type_b_drivers
-            shift_duration = max(self.shift_duration_a, self.shift_duration_b)
-            additional_needed = self.calculate_additional_driver_needs(num_routes, all_drivers, shift_duration)
-            if additional_needed > 0:
-                message = f"Недостаточно водителей.\nДобавьте минимум {additional_needed} водителей или уменьшите число рейсов."
-                messagebox.showerror("Ошибка", message)
-                return
-            if not self.type_a_drivers and not self.type_b_drivers:
-                messagebox.showerror("Ошибка", "Нет водителей.")
-                return
-            if self.is_weekend(selected_day) and not self.type_b_drivers:
-                message = "Выходной: Тип A не работает, а типа B нет."
-                messagebox.showerror("Ошибка", message)
-                return
-            if self.is_weekend(selected_day) and not self.type_a_drivers and self.type_b_drivers:
-                additional_b = self.calculate_additional_driver_needs(num_routes, self.type_b_drivers, self.shift_duration_b)
-                if additional_b > 0:
-                    message = f"Недостаточно водителей B на выходной. Нужно {additional_b}."
-                    messagebox.showerror("Ошибка", message)
-                    return
-            self.execute_genetic_algorithm(all_drivers, shift_duration, num_routes, selected_day, generations=50, population_size=20, mutation_rate=0.1, break_time=10, min_break_time=30)
         except ValueError:
             messagebox.showerror("Ошибка", "Не удалось сгенерировать: нужно добавить ещё водителей или уменьшить число рейсов.")
+            return
+        if self.network_lines:
+            messagebox.showerror("Ошибка", "Для сети из нескольких линий используйте «Прямое расписание».")
+            return
+        request = self.make_schedule_request(num_routes)
+        if self.week_mode_var.get():
+            self.start_week_schedule(request, 'genetic', "Генетическое расписание на неделю")
+            return
+        params = self.read_genetic_parameters()
+        if params is None:
+            return
+        from capacity import estimate_for_engine
+        from island_ga import IslandGeneticAlgorithm
+        if not self.precheck_capacity(estimate_for_engine(request, 'genetic')):
+            return
+        cache_name = "island:" + ",".join(str(value) for value in params.values())
+        cached = self.cached_schedule(request, cache_name)
+        if cached is not None:
+            self.show_schedule_result(cached, self.root)
+            return
+        warm_start = self.nearest_cached_schedule(request)
+        def run(progress, cancel_event, stats):
+            island_ga = IslandGeneticAlgorithm(
+                request,
+                islands=params['islands'],
+                island_size=params['island_size'],
+                migration_interval=params['migration_interval'],
+                patience=params['patience'],
+                progress=progress,
+                cancel_event=cancel_event,
+                stats=stats
+            )
+            return island_ga.run(generations=params['generations'], mutation_rate=params['mutation_rate'], warm_start=warm_start)
+        self.run_schedule_job(run, "Генетическое расписание", "Не удалось сгенерировать: нужно добавить ещё водителей или уменьшить число рейсов.", (request, cache_name))
+    
+    def read_genetic_parameters(self):
+        try:
+            params = {
+                'generations': int(self.ga_generations_entry.get()),
+                'islands': int(self.ga_islands_entry.get()),
+                'island_size': int(self.ga_island_size_entry.get()),
+                'mutation_rate': float(self.ga_mutation_entry.get().replace(",", ".")),
+                'migration_interval': int(self.ga_migration_entry.get()),
+                'patience': int(self.ga_patience_entry.get())
+            }
+        except ValueError:
+            params = None
+        if params is None or min(params['generations'], params['islands'], params['migration_interval'], params['patience']) < 1 or params['island_size'] < 2 or not 0 <= params['mutation_rate'] <= 1:
+            messagebox.showerror("Ошибка", "Проверьте параметры генетического алгоритма: целые числа больше нуля, мутация от 0 до 1.")
+            return None
+        return params
     
     def start_schedule_creation(self):
+        if self.network_lines:
+            self.start_network_schedule()
+            return
         try:
             num_routes = int(self.total_routes_entry.get())
-            selected_day = self.selected_day_var.get()
-            all_drivers = self.type_a_drivers + self.type_b_drivers
-            if not self.type_a_drivers and not self.type_b_drivers:
-                messagebox.showerror("Ошибка", "Нет водителей.")
-                return
-            if self.is_weekend(selected_day) and not self.type_b_drivers:
-                messagebox.showerror("Ошибка", "Выходной: Тип A не работает, а типа B нет.")
-                return
-            if self.is_weekend(selected_day) and not self.type_a_drivers and self.type_b_drivers:
-                additional_b = self.calculate_additional_driver_needs(num_routes, self.type_b_drivers, self.shift_duration_b)
-                if additional_b > 0:
-                    message = f"Недостаточно водителей B на выходной. Нужно {additional_b}."
-                    messagebox.showerror("Ошибка", message)
-                    return
-                self.build_optimized_timetable(self.type_b_drivers, self.shift_duration_b, num_routes, selected_day, self.root)
-                return
-            max_shift = max(self.shift_duration_a, self.shift_duration_b)
-            self.build_optimized_timetable(all_drivers, max_shift, num_routes, selected_day, self.root)
         except ValueError:
             messagebox.showerror("Ошибка", "Проверьте введенные данные.")
+            return
+        request = self.make_schedule_request(num_routes)
+        fast_mode = self.fast_mode_var.get()
+        engine_name = 'fast' if fast_mode else 'direct'
+        if self.week_mode_var.get():
+            self.start_week_schedule(request, engine_name, "Прямое расписание на неделю")
+            return
+        from capacity import estimate_for_engine
+        from dispatcher import HeapDispatcher
+        if not self.precheck_capacity(estimate_for_engine(request, engine_name)):
+            return
+        cached = self.cached_schedule(request, engine_name)
+        if cached is not None:
+            self.show_schedule_result(cached, self.root)
+            return
+        warm_start = None if fast_mode else self.nearest_cached_schedule(request)
+        def run(progress, cancel_event, stats):
+            if fast_mode:
+                return HeapDispatcher(request, progress=progress, cancel_event=cancel_event, stats=stats).run()
+            engine = ScheduleEngine(request, progress=progress, cancel_event=cancel_event, stats=stats)
+            return engine.build_optimized_timetable(warm_start=warm_start)
+        self.run_schedule_job(run, "Прямое расписание", "Проверьте введенные данные.", (request, engine_name))
+    
+    def start_local_search(self):
+        try:
+            num_routes = int(self.total_routes_entry.get())
+            time_budget = float(self.local_budget_entry.get().replace(",", "."))
+        except ValueError:
+            messagebox.showerror("Ошибка", "Проверьте введенные данные.")
+            return
+        if time_budget <= 0:
+            messagebox.showerror("Ошибка", "Время локального поиска должно быть больше нуля.")
+            return
+        if self.network_lines or self.week_mode_var.get():
+            messagebox.showerror("Ошибка", "Локальный поиск работает с одной линией на один день.")
+            return
+        request = self.make_schedule_request(num_routes)
+        from capacity import estimate_for_engine
+        from local_search import LocalSearchOptimizer
+        if not self.precheck_capacity(estimate_for_engine(request, 'local')):
+            return
+        cache_name = f"local:{time_budget}"
+        cached = self.cached_schedule(request, cache_name)
+        if cached is not None:
+            self.show_schedule_result(cached, self.root)
+            return
+        warm_start = self.nearest_cached_schedule(request)
+        def run(progress, cancel_event, stats):
+            optimizer = LocalSearchOptimizer(request, time_budget, progress=progress, cancel_event=cancel_event, stats=stats)
+            return optimizer.run(warm_start=warm_start)
+        self.run_schedule_job(run, "Локальный поиск", "Проверьте введенные данные.", (request, cache_name))
+    
+    def start_network_schedule(self):
+        if self.week_mode_var.get():
+            messagebox.showerror("Ошибка", "Недельный режим пока работает только с одной линией.")
+            return
+        request = self.make_schedule_request(0)
+        lines = list(self.network_lines)
+        from capacity import estimate_network
+        from network import NetworkScheduler
+        if not self.precheck_capacity(estimate_network(request, lines)):
+            return
+        def run(progress, cancel_event, stats):
+            return NetworkScheduler(request, lines, progress=progress, cancel_event=cancel_event, stats=stats).run()
+        self.run_schedule_job(run, "Расписание сети", "Проверьте параметры линий.")
+    
+    def start_week_schedule(self, request, engine_name, title_text):
+        from capacity import estimate_week
+        from schedule_cache import WEEK_PREFIX
+        from week_schedule import WeekScheduler
+        if not self.precheck_capacity(estimate_week(request, engine_name)):
+            return
+        cache_name = WEEK_PREFIX + engine_name
+        cached = self.cached_schedule(request, cache_name)
+        if cached is not None:
+            self.show_schedule_result(cached, self.root)
+            return
+        def run(progress, cancel_event, stats):
+            return WeekScheduler(request, engine_name, progress=progress, cancel_event=cancel_event, stats=stats).run()
+        self.run_schedule_job(run, title_text, "Не удалось составить расписание на неделю.", (request, cache_name))
     
     def build_navigation_panel(self):
         sidebar_width = 200
@@ -445,6 +359,9 @@ class RouteScheduler:
         register_driver_button = tb.Button(self.driver_registration_frame, text="Зарегистрировать", command=self.register_driver, bootstyle=INFO, width=20, compound=LEFT)
         register_driver_button.pack(pady=20)
         self.hover_effect_button(register_driver_button, bootstyle_default=INFO, bootstyle_hover=SUCCESS)
+        import_roster_button = tb.Button(self.driver_registration_frame, text="Импорт списка", command=self.import_driver_roster, bootstyle=INFO, width=20, compound=LEFT)
+        import_roster_button.pack(pady=10)
+        self.hover_effect_button(import_roster_button, bootstyle_default=INFO, bootstyle_hover=SUCCESS)
     
     def setup_route_configuration(self):
         self.route_configuration_frame = tb.Frame(self.main_content)
@@ -461,6 +378,11 @@ class RouteScheduler:
         apply_route_config_button = tb.Button(self.route_configuration_frame, text="Применить параметры", command=self.set_route_parameters, bootstyle=INFO, width=20, compound=LEFT)
         apply_route_config_button.pack(pady=20)
         self.hover_effect_button(apply_route_config_button, bootstyle_default=INFO, bootstyle_hover=SUCCESS)
+        import_lines_button = tb.Button(self.route_configuration_frame, text="Загрузить линии", command=self.import_network_lines, bootstyle=INFO, width=20, compound=LEFT)
+        import_lines_button.pack(pady=10)
+        self.hover_effect_button(import_lines_button, bootstyle_default=INFO, bootstyle_hover=SUCCESS)
+        self.network_lines_label = tb.Label(self.route_configuration_frame, text="Линии сети не загружены: одна линия с параметрами выше.", font=("Helvetica", 12))
+        self.network_lines_label.pack(pady=5)
         clear_data_button = tb.Button(self.route_configuration_frame, text="Очистить данные", command=self.clear_all_records, bootstyle=WARNING, width=20, compound=LEFT)
         clear_data_button.pack(pady=10)
         self.hover_effect_button(clear_data_button, bootstyle_default=WARNING, bootstyle_hover=INFO)
@@ -473,14 +395,49 @@ class RouteScheduler:
         timetable_creation_input_frame.pack(pady=10)
         tb.Label(timetable_creation_input_frame, text="Выберите день:", font=("Helvetica", 14)).grid(row=0, column=0, padx=10, pady=10, sticky='e')
         self.selected_day_var = tb.StringVar(value="Понедельник")
-        self.selected_day_menu = tb.Combobox(timetable_creation_input_frame, textvariable=self.selected_day_var, values=["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"], state="readonly", width=38, font=("Helvetica", 14))
+        self.selected_day_menu = tb.Combobox(timetable_creation_input_frame, textvariable=self.selected_day_var, values=DAYS, state="readonly", width=38, font=("Helvetica", 14))
         self.selected_day_menu.grid(row=0, column=1, padx=10, pady=10)
+        self.fast_mode_var = tb.BooleanVar(value=False)
+        fast_mode_check = tb.Checkbutton(timetable_creation_input_frame, text="Быстрый режим (одинаковый результат при каждом запуске)", variable=self.fast_mode_var, bootstyle="round-toggle")
+        fast_mode_check.grid(row=1, column=0, columnspan=2, padx=10, pady=10)
+        self.collect_stats_var = tb.BooleanVar(value=False)
+        collect_stats_check = tb.Checkbutton(timetable_creation_input_frame, text="Собирать статистику запуска", variable=self.collect_stats_var, bootstyle="round-toggle")
+        collect_stats_check.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
+        self.use_cache_var = tb.BooleanVar(value=True)
+        use_cache_check = tb.Checkbutton(timetable_creation_input_frame, text="Использовать сохранённые расписания", variable=self.use_cache_var, bootstyle="round-toggle")
+        use_cache_check.grid(row=3, column=0, columnspan=2, padx=10, pady=10)
+        self.week_mode_var = tb.BooleanVar(value=False)
+        week_mode_check = tb.Checkbutton(timetable_creation_input_frame, text="Вся неделя (все дни за один запуск)", variable=self.week_mode_var, bootstyle="round-toggle")
+        week_mode_check.grid(row=4, column=0, columnspan=2, padx=10, pady=10)
+        tb.Label(timetable_creation_input_frame, text="Время локального поиска (с):", font=("Helvetica", 14)).grid(row=5, column=0, padx=10, pady=10, sticky='e')
+        self.local_budget_entry = tb.Entry(timetable_creation_input_frame, width=10, font=("Helvetica", 14))
+        self.local_budget_entry.insert(0, "2")
+        self.local_budget_entry.grid(row=5, column=1, padx=10, pady=10, sticky='w')
+        genetic_frame = tb.Labelframe(self.timetable_creation_frame, text="Параметры генетического алгоритма", bootstyle=INFO)
+        genetic_frame.pack(pady=10)
+        genetic_fields = [
+            ("Поколений (максимум):", 'ga_generations_entry', 50),
+            ("Островов (процессов):", 'ga_islands_entry', max(1, min(4, os.cpu_count() or 1))),
+            ("Особей на острове:", 'ga_island_size_entry', 20),
+            ("Начальная вероятность мутации:", 'ga_mutation_entry', 0.1),
+            ("Миграция каждые N поколений:", 'ga_migration_entry', 5),
+            ("Остановка после N миграций без улучшения:", 'ga_patience_entry', 3)
+        ]
+        for row, (label, attribute, default) in enumerate(genetic_fields):
+            tb.Label(genetic_frame, text=label, font=("Helvetica", 12)).grid(row=row, column=0, padx=10, pady=5, sticky='e')
+            entry = tb.Entry(genetic_frame, width=10, font=("Helvetica", 12))
+            entry.insert(0, str(default))
+            entry.grid(row=row, column=1, padx=10, pady=5)
+            setattr(self, attribute, entry)
         generate_timetable_button = tb.Button(self.timetable_creation_frame, text="Прямое расписание", command=self.start_schedule_creation, bootstyle=SUCCESS, width=25, compound=LEFT)
         generate_timetable_button.pack(pady=10)
         self.hover_effect_button(generate_timetable_button, bootstyle_default=SUCCESS, bootstyle_hover=DANGER)
         generate_genetic_timetable_button = tb.Button(self.timetable_creation_frame, text="Генетическое расписания", command=self.start_genetic_schedule, bootstyle=DANGER, width=30, compound=LEFT)
         generate_genetic_timetable_button.pack(pady=10)
         self.hover_effect_button(generate_genetic_timetable_button, bootstyle_default=DANGER, bootstyle_hover=WARNING)
+        local_search_button = tb.Button(self.timetable_creation_frame, text="Локальный поиск", command=self.start_local_search, bootstyle=WARNING, width=25, compound=LEFT)
+        local_search_button.pack(pady=10)
+        self.hover_effect_button(local_search_button, bootstyle_default=WARNING, bootstyle_hover=SUCCESS)
     
     def display_section(self, section_name):
         self.driver_registration_frame.pack_forget()
@@ -514,12 +471,52 @@ class RouteScheduler:
         self.driver_name_entry.delete(0, tb.END)
         self.refresh_main_status(f"Водитель '{name}' зарегистрирован.", SUCCESS)
     
+    def import_driver_roster(self):
+        path = filedialog.askopenfilename(filetypes=[("Список водителей", "*.csv *.json"), ("CSV", "*.csv"), ("JSON", "*.json")])
+        if not path:
+            return
+        from roster_io import import_roster
+        try:
+            roster = import_roster(path, self.type_a_drivers, self.type_b_drivers)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Ошибка", f"Не удалось прочитать список водителей:\n{error}")
+            return
+        self.type_a_drivers.extend(roster.type_a_drivers)
+        self.type_b_drivers.extend(roster.type_b_drivers)
+        if roster.rejected or roster.conflicts:
+            details = [f"Строка {position}: {reason}" for position, reason in roster.rejected[:10]]
+            details += [f"'{name}' уже зарегистрирован с другой категорией" for name in roster.conflicts[:10]]
+            messagebox.showwarning("Импорт списка", roster.summary().capitalize() + ".\n\n" + "\n".join(details))
+        self.refresh_main_status(roster.summary().capitalize() + ".", SUCCESS if roster.imported else WARNING)
+    
+    def import_network_lines(self):
+        path = filedialog.askopenfilename(filetypes=[("Линии сети", "*.csv *.json"), ("CSV", "*.csv"), ("JSON", "*.json")])
+        if not path:
+            return
+        from roster_io import import_lines
+        try:
+            lines, rejected = import_lines(path)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Ошибка", f"Не удалось прочитать линии:\n{error}")
+            return
+        if rejected:
+            details = "\n".join(f"Строка {position}: {reason}" for position, reason in rejected[:10])
+            messagebox.showwarning("Загрузка линий", f"Отклонено строк: {len(rejected)}.\n\n{details}")
+        if not lines:
+            return
+        self.network_lines = lines
+        total_trips = sum(line.trips for line in lines)
+        self.network_lines_label.config(text=f"Загружено линий: {len(lines)}, рейсов за день: {total_trips}.")
+        self.refresh_main_status(f"Загружено линий: {len(lines)}.", SUCCESS)
+    
     def clear_all_records(self):
         self.total_routes_entry.delete(0, tb.END)
         self.route_length_entry.delete(0, tb.END)
         self.driver_name_entry.delete(0, tb.END)
         self.type_a_drivers.clear()
         self.type_b_drivers.clear()
+        self.network_lines = []
+        self.network_lines_label.config(text="Линии сети не загружены: одна линия с параметрами выше.")
         self.refresh_main_status("Данные очищены.", WARNING)
     
     def set_route_parameters(self):
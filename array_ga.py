@@ -0,0 +1,172 @@
+import random
+import time
+import numpy as np
+from fitness import BALANCE_WEIGHT, CONFLICT_PENALTY, COVERAGE_WEIGHT, LATE_PENALTY, OVERTIME_PENALTY_PER_MINUTE, WEEKEND_PENALTY
+from schedule_engine import ScheduleEngine, ScheduleResult
+from timeline import SERVICE_END, make_trip
+
+SORT_KEY_STRIDE = 1 << 16
+
+
+def chain_starts(num_routes, route_time, break_time):
+    starts = np.empty(num_routes, dtype=np.int64)
+    start_time = 0
+    for index in range(num_routes):
+        starts[index] = start_time
+        start_time += route_time + break_time
+        if start_time >= SERVICE_END:
+            start_time = 0
+    return starts
+
+
+class ArrayGeneticAlgorithm:
+    def __init__(self, request, seed=None, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.engine = ScheduleEngine(request, random.Random(seed), progress=progress, cancel_event=cancel_event, stats=stats)
+        self.rng = np.random.default_rng(seed)
+        self.driver_names = request.all_drivers
+        self.driver_index = {driver: index for index, driver in enumerate(self.driver_names)}
+        self.driver_count = len(self.driver_names)
+        type_a_count = len(request.type_a_drivers)
+        self.type_a_indices = np.arange(type_a_count)
+        self.type_b_indices = np.arange(type_a_count, self.driver_count)
+        self.limits = np.empty(self.driver_count, dtype=np.int64)
+        self.limits[:type_a_count] = request.shift_duration_a * 60
+        self.limits[type_a_count:] = request.shift_duration_b * 60
+        self.banned = np.zeros(self.driver_count, dtype=np.int64)
+        if request.is_weekend():
+            self.banned[:type_a_count] = 1
+        self.eligible_count = max(1, len(request.eligible_drivers()))
+        self.durations = np.full(request.num_routes, request.travel_duration_minutes, dtype=np.int64)
+        self.route_types = []
+
+    def seed_genome(self):
+        request = self.request
+        schedule, placed = self.engine.generate_genetic_schedule_attempt(self.driver_names, request.num_routes)
+        starts = chain_starts(request.num_routes, request.travel_duration_minutes, request.break_time)
+        drivers = self.rng.integers(0, self.driver_count, size=request.num_routes)
+        self.route_types = [trip.route_type for trip in schedule]
+        self.route_types += [self.engine.rng.choice(request.route_options) for _ in range(request.num_routes - placed)]
+        for index, trip in enumerate(schedule):
+            drivers[index] = self.driver_index[trip.driver]
+        return drivers, starts
+
+    def relabel_permutations(self, population_size):
+        permutations = np.tile(np.arange(self.driver_count), (population_size, 1))
+        for group in (self.type_a_indices, self.type_b_indices):
+            if len(group) > 1:
+                shuffled = np.argsort(self.rng.random((population_size - 1, len(group))), axis=1)
+                permutations[1:, group] = group[shuffled]
+        return permutations
+
+    def initial_population(self, population_size):
+        drivers, starts = self.seed_genome()
+        permutations = self.relabel_permutations(population_size)
+        population_drivers = np.take_along_axis(permutations, np.broadcast_to(drivers, (population_size, len(drivers))), axis=1)
+        population_starts = np.tile(starts, (population_size, 1))
+        return population_drivers, population_starts
+
+    def evaluate(self, drivers, starts):
+        population_size, trip_count = drivers.shape
+        ends = starts + self.durations
+        late = ((starts < 0) | (ends > SERVICE_END)).sum(axis=1)
+        banned = self.banned[drivers].sum(axis=1)
+        flat_index = (np.arange(population_size)[:, None] * self.driver_count + drivers).ravel()
+        weights = np.broadcast_to(self.durations, drivers.shape).ravel()
+        worked = np.bincount(flat_index, weights=weights, minlength=population_size * self.driver_count).reshape(population_size, self.driver_count)
+        overtime_minutes = np.clip(worked - self.limits, 0, None)
+        overtime = overtime_minutes.sum(axis=1)
+        overtime_drivers = (overtime_minutes > 0).sum(axis=1)
+        order = np.argsort(drivers * SORT_KEY_STRIDE + starts, axis=1, kind='stable')
+        sorted_drivers = np.take_along_axis(drivers, order, axis=1)
+        sorted_starts = np.take_along_axis(starts, order, axis=1)
+        sorted_ends = np.take_along_axis(ends, order, axis=1)
+        same_driver = sorted_drivers[:, 1:] == sorted_drivers[:, :-1]
+        too_close = sorted_starts[:, 1:] < sorted_ends[:, :-1] + self.request.min_break_time
+        conflicts = (same_driver & too_close).sum(axis=1)
+        mean = worked.sum(axis=1) / self.eligible_count
+        variance = np.clip((worked ** 2).sum(axis=1) / self.eligible_count - mean ** 2, 0, None)
+        balance = BALANCE_WEIGHT * np.sqrt(variance) / 60
+        penalty = CONFLICT_PENALTY * conflicts + LATE_PENALTY * late + OVERTIME_PENALTY_PER_MINUTE * overtime + WEEKEND_PENALTY * banned
+        fitness = COVERAGE_WEIGHT * min(trip_count, self.request.num_routes) - penalty - balance
+        violations = conflicts + late + overtime_drivers + banned
+        return fitness, violations
+
+    def crossover(self, drivers, starts, children_needed):
+        parent_count, trip_count = drivers.shape
+        pair_count = (children_needed + 1) // 2
+        first = self.rng.integers(0, parent_count, size=pair_count)
+        second = (first + self.rng.integers(1, max(parent_count, 2), size=pair_count)) % parent_count
+        cuts = self.rng.integers(1, max(trip_count, 2), size=pair_count)
+        mask = np.arange(trip_count)[None, :] < cuts[:, None]
+        child_drivers = np.concatenate([np.where(mask, drivers[first], drivers[second]), np.where(mask, drivers[second], drivers[first])])
+        child_starts = np.concatenate([np.where(mask, starts[first], starts[second]), np.where(mask, starts[second], starts[first])])
+        return child_drivers[:children_needed], child_starts[:children_needed]
+
+    def mutate(self, drivers, starts, mutation_rate):
+        rows = np.flatnonzero(self.rng.random(drivers.shape[0]) < mutation_rate)
+        if not rows.size:
+            return
+        columns = self.rng.integers(0, drivers.shape[1], size=rows.size)
+        drivers[rows, columns] = self.rng.integers(0, self.driver_count, size=rows.size)
+        shifted = self.rng.random(rows.size) < 0.5
+        rows, columns = rows[shifted], columns[shifted]
+        starts[rows, columns] = np.maximum(0, starts[rows, columns] + self.rng.integers(-15, 16, size=rows.size))
+
+    def decode(self, drivers, starts):
+        ends = starts + self.durations
+        route_counts = {}
+        numbers = np.empty(len(drivers), dtype=np.int64)
+        for index in np.argsort(starts, kind='stable'):
+            driver = drivers[index]
+            route_counts[driver] = route_counts.get(driver, 0) + 1
+            numbers[index] = route_counts[driver]
+        return [
+            make_trip(self.driver_names[driver], route_type, int(start), int(end), int(number))
+            for driver, route_type, start, end, number in zip(drivers.tolist(), self.route_types, starts, ends, numbers)
+        ]
+
+    def run(self, generations=50, population_size=20, mutation_rate=0.1):
+        engine = self.engine
+        failure = engine.check_genetic_inputs()
+        if failure:
+            return ScheduleResult(failure=failure)
+        population_size = max(population_size, 2)
+        started = time.perf_counter()
+        drivers, starts = self.initial_population(population_size)
+        fitness, violations = self.evaluate(drivers, starts)
+        if engine.stats is not None:
+            engine.stats.record_time('ga.population', time.perf_counter() - started)
+        leader = int(np.argmax(fitness))
+        best_fitness = fitness[leader]
+        best_drivers, best_starts, best_violations = drivers[leader].copy(), starts[leader].copy(), int(violations[leader])
+        cancelled = False
+        for generation in range(generations):
+            started = time.perf_counter()
+            order = np.argsort(-fitness, kind='stable')
+            drivers, starts, fitness, violations = drivers[order], starts[order], fitness[order], violations[order]
+            if fitness[0] > best_fitness:
+                best_fitness = fitness[0]
+                best_drivers, best_starts, best_violations = drivers[0].copy(), starts[0].copy(), int(violations[0])
+            engine.report_progress(generation + 1, generations)
+            if best_violations == 0:
+                break
+            if engine.is_cancelled():
+                cancelled = True
+                break
+            parent_count = population_size // 2
+            child_drivers, child_starts = self.crossover(drivers[:parent_count], starts[:parent_count], population_size - parent_count)
+            self.mutate(child_drivers, child_starts, mutation_rate)
+            child_fitness, child_violations = self.evaluate(child_drivers, child_starts)
+            drivers = np.concatenate([drivers[:parent_count], child_drivers])
+            starts = np.concatenate([starts[:parent_count], child_starts])
+            fitness = np.concatenate([fitness[:parent_count], child_fitness])
+            violations = np.concatenate([violations[:parent_count], child_violations])
+            engine.record_generation(started)
+        best = {
+            'schedule': self.decode(best_drivers, best_starts),
+            'fitness': float(best_fitness),
+            'complete': best_violations == 0,
+            'violations': best_violations
+        }
+        return engine.genetic_result(best, cancelled)
@@ -0,0 +1,302 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from dispatcher import HeapDispatcher
+from fitness import ScheduleEvaluator
+from island_ga import IslandGeneticAlgorithm
+from local_search import LocalSearchOptimizer
+from parallel_ga import ParallelGeneticAlgorithm
+from schedule_engine import ScheduleEngine, ScheduleRequest
+from timeline import DriverTimeline, SERVICE_END
+
+PROFILES = {
+    'quick': [(10, 100), (100, 1000)],
+    'standard': [(10, 100), (100, 1000), (1000, 10000)],
+    'full': [(10, 100), (100, 1000), (1000, 10000), (10000, 100000)]
+}
+ENGINE_TRIP_LIMITS = {'fast': None, 'direct': 10000, 'array': 20000, 'genetic': 2000, 'parallel': 2000, 'island': 2000, 'local': 10000}
+STARTUP_MODULE = "SIAOD"
+STARTUP_EXTERNAL = ('ttkbootstrap', 'tkinter')
+STARTUP_BUDGET_MS = 100
+DAY_KINDS = {'weekday': "Понедельник", 'weekend': "Суббота"}
+RESULT_FIELDS = [
+    'case', 'engine', 'drivers', 'trips', 'day', 'type_a_share', 'seconds', 'peak_mb',
+    'placed', 'violations', 'fitness', 'failure'
+]
+
+
+def make_request(drivers, trips, day, type_a_share, duration=45, seed=0):
+    rng = random.Random(seed)
+    type_a_count = round(drivers * type_a_share)
+    names = [f"Водитель {index:05d}" for index in range(drivers)]
+    rng.shuffle(names)
+    return ScheduleRequest(
+        type_a_drivers=names[:type_a_count],
+        type_b_drivers=names[type_a_count:],
+        num_routes=trips,
+        travel_duration_minutes=duration,
+        selected_day=day
+    )
+
+
+def run_engine(engine_name, request, seed, generations, population_size, workers, time_budget=0.5):
+    if engine_name == 'fast':
+        return HeapDispatcher(request).run()
+    if engine_name == 'direct':
+        return ScheduleEngine(request, random.Random(seed)).build_optimized_timetable()
+    if engine_name == 'genetic':
+        return ScheduleEngine(request, random.Random(seed)).execute_genetic_algorithm(generations=generations, population_size=population_size)
+    if engine_name == 'parallel':
+        return ParallelGeneticAlgorithm(request, workers=workers, seed=seed).run(generations=generations, population_size=population_size)
+    if engine_name == 'island':
+        return IslandGeneticAlgorithm(request, island_size=population_size, workers=workers, seed=seed).run(generations=generations)
+    if engine_name == 'array':
+        from array_ga import ArrayGeneticAlgorithm
+        return ArrayGeneticAlgorithm(request, seed=seed).run(generations=generations, population_size=population_size)
+    if engine_name == 'local':
+        return LocalSearchOptimizer(request, time_budget, seed=seed).run()
+    raise ValueError(f"Неизвестный движок: {engine_name}")
+
+
+def measure(function, track_memory):
+    gc.collect()
+    started = time.perf_counter()
+    value = function()
+    seconds = time.perf_counter() - started
+    peak_mb = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        function()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return value, seconds, peak_mb
+
+
+def benchmark_engine(engine_name, request, case, type_a_share, args):
+    def run():
+        return run_engine(engine_name, request, args.seed, args.generations, args.population, args.workers, args.time_budget)
+    best_seconds = None
+    for _ in range(args.repeat):
+        result, seconds, peak_mb = measure(run, track_memory=False)
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+    if args.memory:
+        result, seconds, peak_mb = measure(run, track_memory=True)
+    else:
+        peak_mb = None
+    evaluator = ScheduleEvaluator(request, result.schedule)
+    return {
+        'case': case,
+        'engine': engine_name,
+        'drivers': len(request.all_drivers),
+        'trips': request.num_routes,
+        'day': request.selected_day,
+        'type_a_share': type_a_share,
+        'seconds': round(best_seconds, 6),
+        'peak_mb': None if peak_mb is None else round(peak_mb, 3),
+        'placed': len(result.schedule),
+        'violations': evaluator.violation_count(),
+        'fitness': round(evaluator.score(), 3),
+        'failure': (result.failure or '').replace('\n', ' ')
+    }
+
+
+def benchmark_primitives(request, case, type_a_share, args):
+    rng = random.Random(args.seed)
+    schedule = HeapDispatcher(request).run().schedule
+    engine = ScheduleEngine(request, random.Random(args.seed))
+    timelines = {driver: DriverTimeline() for driver in request.all_drivers}
+    for trip in schedule:
+        timelines[trip.driver].add(trip.start, trip.end)
+    drivers = request.all_drivers
+    limits = request.shift_limits(drivers)
+    queries = [(rng.choice(drivers), rng.randint(0, SERVICE_END - request.travel_duration_minutes)) for _ in range(args.queries)]
+    route_time = request.travel_duration_minutes
+    min_break = request.min_break_time
+
+    def can_assign():
+        for driver, start in queries:
+            engine.can_assign_route(start, route_time, timelines[driver], limits[driver], min_break)
+
+    def free_periods():
+        return engine.find_free_periods(timelines, route_time, request.break_time)
+
+    def full_evaluation():
+        return ScheduleEvaluator(request, schedule)
+
+    individual = engine.make_individual(engine.pack_schedule(schedule))
+
+    def delta_evaluation():
+        for _ in range(args.queries):
+            engine.mutate_individual(individual, drivers)
+
+    rows = []
+    for name, function, operations in (
+        ('can_assign_route', can_assign, len(queries)),
+        ('find_free_periods', free_periods, 1),
+        ('evaluate_full', full_evaluation, 1),
+        ('evaluate_delta', delta_evaluation, args.queries)
+    ):
+        value, seconds, peak_mb = measure(function, track_memory=args.memory)
+        rows.append({
+            'case': case,
+            'engine': f"primitive:{name}",
+            'drivers': len(drivers),
+            'trips': len(schedule),
+            'day': request.selected_day,
+            'type_a_share': type_a_share,
+            'seconds': round(seconds / operations, 9),
+            'peak_mb': None if peak_mb is None else round(peak_mb, 3),
+            'placed': len(schedule),
+            'violations': None,
+            'fitness': None,
+            'failure': ''
+        })
+    return rows
+
+
+def import_times(module):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"не удалось импортировать {module}")
+    times = []
+    for line in completed.stderr.splitlines():
+        fields = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(fields) == 3 and fields[0].strip().isdigit():
+            name = fields[2].rstrip()
+            depth = (len(name) - len(name.lstrip())) // 2
+            times.append((name.strip(), depth, int(fields[0]), int(fields[1])))
+    return times
+
+
+def startup_split(times):
+    total = next(cumulative for name, depth, own, cumulative in times if name == STARTUP_MODULE and depth == 0)
+    external = sum(cumulative for name, depth, own, cumulative in times if depth == 1 and name.split('.')[0] in STARTUP_EXTERNAL)
+    return total / 1000, external / 1000
+
+
+def benchmark_startup(args):
+    runs = [import_times(STARTUP_MODULE) for _ in range(max(3, args.repeat))]
+    splits = sorted((startup_split(times) for times in runs), key=lambda split: split[0] - split[1])
+    total_ms, external_ms = splits[len(splits) // 2]
+    own_ms = total_ms - external_ms
+    print(f"{STARTUP_MODULE}: импорт {total_ms:.1f} мс, из них {', '.join(STARTUP_EXTERNAL)} {external_ms:.1f} мс, своё {own_ms:.1f} мс (бюджет {args.startup_budget:.0f} мс)", file=sys.stderr)
+    for name, depth, own, cumulative in sorted(runs[-1], key=lambda item: item[2], reverse=True)[:8]:
+        print(f"    {name:<40} {own / 1000:>8.1f} мс", file=sys.stderr)
+    return {
+        'case': 'startup',
+        'engine': f"startup:{STARTUP_MODULE}",
+        'drivers': None,
+        'trips': None,
+        'day': None,
+        'type_a_share': None,
+        'seconds': round(own_ms / 1000, 6),
+        'peak_mb': None,
+        'placed': None,
+        'violations': None,
+        'fitness': None,
+        'failure': '' if own_ms <= args.startup_budget else f"превышен бюджет запуска: {own_ms:.1f} мс > {args.startup_budget:.0f} мс"
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = {(row['case'], row['engine']): row for row in json.load(baseline_file)['results']}
+    for row in results:
+        previous = baseline.get((row['case'], row['engine']))
+        if previous and previous['seconds']:
+            ratio = row['seconds'] / previous['seconds']
+            marker = "  <-- медленнее" if ratio > 1.1 else ""
+            print(f"{row['case']:<40} {row['engine']:<28} {previous['seconds']:>12.6f} -> {row['seconds']:>12.6f}  x{ratio:.2f}{marker}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Замеры скорости составления расписания без графического интерфейса.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default='quick')
+    parser.add_argument("--engines", nargs='+', default=['fast', 'direct', 'genetic', 'array'], choices=sorted(ENGINE_TRIP_LIMITS))
+    parser.add_argument("--days", nargs='+', default=['weekday', 'weekend'], choices=sorted(DAY_KINDS))
+    parser.add_argument("--mixes", nargs='+', type=float, default=[0.5], help="доля водителей типа A")
+    parser.add_argument("--duration", type=int, default=45)
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--population", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--time-budget", type=float, default=0.5, help="секунд на локальный поиск")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--memory", action='store_true', help="дополнительно замерить пиковую память (tracemalloc)")
+    parser.add_argument("--no-limits", action='store_true', help="не пропускать медленные движки на больших размерах")
+    parser.add_argument("--skip-primitives", action='store_true')
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--compare", default=None, help="JSON с прошлым прогоном для сравнения")
+    parser.add_argument("--startup", action='store_true', help="вместо движков замерить холодный импорт SIAOD.py в новом процессе")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, help="допустимое время импорта своих модулей, мс (без ttkbootstrap и tkinter)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = []
+    if args.startup:
+        try:
+            results.append(benchmark_startup(args))
+        except RuntimeError as error:
+            print(f"{STARTUP_MODULE}: {error}", file=sys.stderr)
+            return 2
+    for drivers, trips in [] if args.startup else PROFILES[args.profile]:
+        for day_kind in args.days:
+            for share in args.mixes:
+                case = f"{drivers}x{trips}/{day_kind}/A{share:.2f}"
+                request = make_request(drivers, trips, DAY_KINDS[day_kind], share, args.duration, args.seed)
+                for engine_name in args.engines:
+                    limit = ENGINE_TRIP_LIMITS[engine_name]
+                    if limit is not None and trips > limit and not args.no_limits:
+                        continue
+                    row = benchmark_engine(engine_name, request, case, share, args)
+                    results.append(row)
+                    print(f"{case:<40} {engine_name:<28} {row['seconds']:>10.4f} s  placed {row['placed']}/{trips}  violations {row['violations']}", file=sys.stderr)
+                if not args.skip_primitives:
+                    results.extend(benchmark_primitives(request, case, share, args))
+    report = {
+        'commit': current_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'profile': args.profile,
+        'results': results
+    }
+    with open(args.output, "w", encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline='', encoding='utf-8') as output:
+            writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    if args.compare:
+        compare(results, args.compare)
+    return 1 if any(row['case'] == 'startup' and row['failure'] for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+from dataclasses import dataclass, replace
+from dispatcher import build_trip_demand
+from network import build_network_demand, network_request
+from schedule_engine import DAYS
+from timeline import SERVICE_END, minutes_to_clock
+from week_schedule import build_rota
+
+
+@dataclass
+class CapacityEstimate:
+    min_drivers: int
+    available: int
+    binding: str
+    peak_trips: int = 0
+    peak_time: int = 0
+    demand_minutes: int = 0
+    capacity_minutes: int = 0
+    failure: str = None
+
+    @property
+    def ok(self):
+        return self.failure is None
+
+    def summary(self):
+        return f"Нужно не меньше {self.min_drivers} водителей (доступно {self.available}), ограничение: {self.binding}."
+
+
+def peak_concurrency(trips, min_break_time):
+    events = []
+    for start, duration, label in trips:
+        events.append((start, 1))
+        events.append((start + duration + min_break_time, -1))
+    events.sort()
+    current = 0
+    peak = 0
+    peak_time = 0
+    for time, change in events:
+        current += change
+        if current > peak:
+            peak = current
+            peak_time = time
+    return peak, peak_time
+
+
+def drivers_to_cover(capacities, demand):
+    covered = 0
+    count = 0
+    for capacity in sorted(capacities, reverse=True):
+        if covered >= demand:
+            return count
+        covered += capacity
+        count += 1
+    if covered >= demand:
+        return count
+    return count + -(-(demand - covered) // max(capacities, default=1))
+
+
+def estimate_capacity(request, trips=None, fixed_times=False):
+    if trips is None:
+        trips = build_trip_demand(request)
+    eligible_drivers = request.eligible_drivers()
+    available = len(eligible_drivers)
+    weekend_note = " (водители A в выходной не работают)" if request.is_weekend() and request.type_a_drivers else ""
+    if not trips:
+        return CapacityEstimate(0, available, "рейсов нет")
+    shift_limits = list(request.shift_limits(eligible_drivers).values())
+    min_break_time = request.min_break_time
+    durations = [duration for start, duration, label in trips]
+    shortest = min(durations)
+    longest = max(durations)
+    demand_minutes = sum(durations)
+    peak, peak_time = peak_concurrency(trips, min_break_time)
+    if not shift_limits:
+        binding = "нет водителей" + weekend_note
+        return CapacityEstimate(max(1, peak), 0, binding, peak, peak_time, demand_minutes, 0, f"Недостаточно водителей: {binding}.")
+    if longest > max(shift_limits) or longest > SERVICE_END:
+        binding = f"рейс длительностью {longest} мин не помещается в смену или рабочий день"
+        return CapacityEstimate(available + 1, available, binding, peak, peak_time, demand_minutes, sum(shift_limits), f"Расписание невозможно: {binding}.")
+    window_trips = (SERVICE_END + min_break_time) // (shortest + min_break_time)
+    bounds = []
+    hours_needed = drivers_to_cover(shift_limits, demand_minutes)
+    bounds.append((hours_needed, f"часы смен: рейсы занимают {demand_minutes / 60:.1f} ч, смены водителей дают {sum(shift_limits) / 60:.1f} ч{weekend_note}"))
+    trip_capacities = [min(window_trips, limit // shortest) for limit in shift_limits]
+    trips_needed = drivers_to_cover(trip_capacities, len(trips))
+    bounds.append((trips_needed, f"рабочий день 06:00-03:00 и перерывы: водитель успевает не больше {max(trip_capacities)} рейсов{weekend_note}"))
+    if fixed_times:
+        bounds.append((peak, f"пик {peak} одновременных рейсов около {minutes_to_clock(peak_time)} с учётом перерыва {min_break_time} мин"))
+    min_drivers, binding = max(bounds, key=lambda bound: bound[0])
+    estimate = CapacityEstimate(min_drivers, available, binding, peak, peak_time, demand_minutes, sum(shift_limits))
+    if min_drivers > available:
+        shortage = min_drivers - available
+        estimate.failure = f"Недостаточно водителей: нужно ещё минимум {shortage}.\nОграничение: {binding}."
+    return estimate
+
+
+def shortest_trip_demand(request):
+    shortest = min(request.route_time(route_type) for route_type in request.route_options)
+    return [(0, shortest, "")] * request.num_routes
+
+
+def estimate_for_engine(request, engine_name):
+    trips = None if engine_name == 'fast' else shortest_trip_demand(request)
+    return estimate_capacity(request, trips)
+
+
+def estimate_week(request, engine_name):
+    tightest = None
+    rota = build_rota(request)
+    for day in DAYS:
+        type_a_drivers, type_b_drivers = rota[day]
+        day_request = replace(request, type_a_drivers=list(type_a_drivers), type_b_drivers=list(type_b_drivers), selected_day=day)
+        estimate = estimate_for_engine(day_request, engine_name)
+        if not estimate.ok:
+            estimate.failure = f"{day}: {estimate.failure}"
+            return estimate
+        estimate.binding = f"{day}: {estimate.binding}"
+        if tightest is None or estimate.available - estimate.min_drivers < tightest.available - tightest.min_drivers:
+            tightest = estimate
+    return tightest
+
+
+def estimate_network(request, lines):
+    trips, overflow = build_network_demand(lines)
+    return estimate_capacity(network_request(request, lines), trips, fixed_times=True)
@@ -0,0 +1,76 @@
+import heapq
+from schedule_engine import ScheduleEngine, ScheduleResult
+from timeline import SERVICE_END, make_trip
+
+PROGRESS_STEP = 256
+
+
+def build_trip_demand(request):
+    trips = []
+    overflow = []
+    current_time = 0
+    for index in range(request.num_routes):
+        route_type = request.route_options[index % len(request.route_options)]
+        route_time = request.route_time(route_type)
+        if current_time + route_time <= SERVICE_END:
+            trips.append((current_time, route_time, route_type))
+            current_time += route_time + request.break_time + request.min_break_time
+        else:
+            overflow.append((route_time, route_type))
+    for position, (route_time, route_type) in enumerate(overflow):
+        start = position * max(0, SERVICE_END - route_time) // len(overflow)
+        trips.append((start, route_time, f"{route_type} (доп рейс)"))
+    trips.sort(key=lambda trip: trip[0])
+    return trips
+
+
+class HeapDispatcher:
+    def __init__(self, request, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.engine = ScheduleEngine(request, progress=progress, cancel_event=cancel_event, stats=stats)
+
+    def run(self, trips=None):
+        request = self.request
+        engine = self.engine
+        driver_list, failure = engine.direct_driver_pool()
+        if failure:
+            return ScheduleResult(failure=failure)
+        eligible_drivers = request.eligible_drivers(driver_list)
+        engine.note_exclusions(driver_list, eligible_drivers)
+        shift_limits = request.shift_limits(eligible_drivers)
+        remaining_minutes = [shift_limits[driver] for driver in eligible_drivers]
+        route_counts = [0] * len(eligible_drivers)
+        available = [(0, index) for index in range(len(eligible_drivers))]
+        if trips is None:
+            trips = build_trip_demand(request)
+        shortest_trip = min((route_time for start, route_time, route_type in trips), default=0)
+        schedule = []
+        for position, (start, route_time, route_type) in enumerate(trips):
+            if position % PROGRESS_STEP == 0:
+                if engine.is_cancelled():
+                    return ScheduleResult(schedule=schedule, title="Формирование отменено. Частичное расписание:", cancelled=True)
+                engine.report_progress(position, len(trips))
+            chosen = None
+            deferred = []
+            while available and available[0][0] <= start:
+                free_from, index = heapq.heappop(available)
+                if remaining_minutes[index] >= route_time:
+                    chosen = index
+                    break
+                if remaining_minutes[index] >= shortest_trip:
+                    deferred.append((free_from, index))
+            if deferred:
+                if engine.stats is not None:
+                    engine.stats.count('dispatch.deferred', len(deferred))
+                for item in deferred:
+                    heapq.heappush(available, item)
+            if chosen is None:
+                message = "Расписание не утверждено.\nНужно добавить сотрудников или уменьшить число рейсов."
+                return ScheduleResult(schedule=schedule, failure=message)
+            remaining_minutes[chosen] -= route_time
+            route_counts[chosen] += 1
+            schedule.append(make_trip(eligible_drivers[chosen], route_type, start, start + route_time, route_counts[chosen]))
+            heapq.heappush(available, (start + route_time + request.min_break_time, chosen))
+        engine.report_progress(len(trips), len(trips))
+        title = "Итоговое расписание:" if schedule else "Расписание не сформировано."
+        return ScheduleResult(schedule=schedule, title=title)
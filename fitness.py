@@ -0,0 +1,176 @@
+import bisect
+from array import array
+from timeline import SERVICE_END
+
+COVERAGE_WEIGHT = 100
+CONFLICT_PENALTY = 60
+LATE_PENALTY = 60
+WEEKEND_PENALTY = 100
+UNKNOWN_DRIVER_PENALTY = 100
+OVERTIME_PENALTY_PER_MINUTE = 1
+BALANCE_WEIGHT = 10
+TIME_BIAS = 1 << 20
+TIME_SPAN = 1 << 21
+DRIVER_SPAN = TIME_SPAN * TIME_SPAN
+
+
+def interval_key(driver_id, start, end):
+    return (driver_id * TIME_SPAN + start + TIME_BIAS) * TIME_SPAN + end + TIME_BIAS
+
+
+def key_start(key):
+    return key // TIME_SPAN % TIME_SPAN - TIME_BIAS
+
+
+def key_end(key):
+    return key % TIME_SPAN - TIME_BIAS
+
+
+class ScheduleEvaluator:
+    def __init__(self, request, schedule=()):
+        drivers = request.all_drivers
+        shift_limits = request.shift_limits(drivers)
+        banned = set(request.type_a_drivers) if request.is_weekend() else set()
+        self.num_routes = request.num_routes
+        self.min_break = request.min_break_time
+        self.driver_ids = {}
+        for driver_id, driver in enumerate(drivers):
+            self.driver_ids.setdefault(driver, driver_id)
+        self.shift_limits = array('i', [shift_limits[driver] for driver in drivers])
+        self.banned = array('b', [driver in banned for driver in drivers])
+        self.driver_count = len(request.eligible_drivers())
+        self.keys = array('q')
+        self.worked = array('i', [0]) * len(drivers)
+        self.trip_count = 0
+        self.unknown_trips = 0
+        self.conflicts = 0
+        self.late_trips = 0
+        self.banned_trips = 0
+        self.overtime = 0
+        self.overtime_drivers = 0
+        self.worked_total = 0
+        self.worked_squares = 0
+        for trip in schedule:
+            self.add_trip(trip)
+
+    def copy(self):
+        clone = ScheduleEvaluator.__new__(ScheduleEvaluator)
+        clone.__dict__.update(self.__dict__)
+        clone.keys = self.keys[:]
+        clone.worked = self.worked[:]
+        return clone
+
+    def is_conflict(self, previous_key, next_key):
+        if previous_key is None or next_key is None or previous_key // DRIVER_SPAN != next_key // DRIVER_SPAN:
+            return 0
+        return 1 if key_start(next_key) < key_end(previous_key) + self.min_break else 0
+
+    def neighbours(self, index):
+        keys = self.keys
+        previous_key = keys[index - 1] if index > 0 else None
+        next_key = keys[index] if index < len(keys) else None
+        return previous_key, next_key
+
+    def add_interval(self, driver_id, start, end):
+        self.trip_count += 1
+        if driver_id is None:
+            self.unknown_trips += 1
+            return
+        key = interval_key(driver_id, start, end)
+        index = bisect.bisect_left(self.keys, key)
+        previous_key, next_key = self.neighbours(index)
+        self.conflicts += self.is_conflict(previous_key, key) + self.is_conflict(key, next_key) - self.is_conflict(previous_key, next_key)
+        self.keys.insert(index, key)
+        self.count_interval(driver_id, start, end, 1)
+
+    def remove_interval(self, driver_id, start, end):
+        self.trip_count -= 1
+        if driver_id is None:
+            self.unknown_trips -= 1
+            return
+        key = interval_key(driver_id, start, end)
+        index = bisect.bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return
+        del self.keys[index]
+        previous_key, next_key = self.neighbours(index)
+        self.conflicts += self.is_conflict(previous_key, next_key) - self.is_conflict(previous_key, key) - self.is_conflict(key, next_key)
+        self.count_interval(driver_id, start, end, -1)
+
+    def replace_interval(self, old_interval, new_interval):
+        if old_interval == new_interval:
+            return
+        if old_interval is not None:
+            self.remove_interval(*old_interval)
+        if new_interval is not None:
+            self.add_interval(*new_interval)
+
+    def count_interval(self, driver_id, start, end, sign):
+        if start < 0 or end > SERVICE_END:
+            self.late_trips += sign
+        self.banned_trips += sign * self.banned[driver_id]
+        limit = self.shift_limits[driver_id]
+        before = self.worked[driver_id]
+        after = before + sign * (end - start)
+        self.worked[driver_id] = after
+        self.overtime += max(0, after - limit) - max(0, before - limit)
+        self.overtime_drivers += (after > limit) - (before > limit)
+        self.worked_total += after - before
+        self.worked_squares += after * after - before * before
+
+    def add_trip(self, trip):
+        self.add_interval(self.driver_ids.get(trip.driver), trip.start, trip.end)
+
+    def remove_trip(self, trip):
+        self.remove_interval(self.driver_ids.get(trip.driver), trip.start, trip.end)
+
+    def replace_trip(self, old_trip, new_trip):
+        if old_trip is new_trip:
+            return
+        if old_trip is not None:
+            self.remove_trip(old_trip)
+        if new_trip is not None:
+            self.add_trip(new_trip)
+
+    def add_driver(self, driver, shift_limit, banned=False):
+        self.driver_ids = dict(self.driver_ids, **{driver: len(self.shift_limits)})
+        self.shift_limits = self.shift_limits + array('i', [shift_limit])
+        self.banned = self.banned + array('b', [banned])
+        self.worked = self.worked + array('i', [0])
+        if not banned:
+            self.driver_count += 1
+
+    def remove_driver(self, driver):
+        driver_id = self.driver_ids.get(driver)
+        if driver_id is None:
+            return
+        first = bisect.bisect_left(self.keys, driver_id * DRIVER_SPAN)
+        last = bisect.bisect_left(self.keys, (driver_id + 1) * DRIVER_SPAN)
+        for key in reversed(self.keys[first:last]):
+            self.remove_interval(driver_id, key_start(key), key_end(key))
+            self.add_interval(None, key_start(key), key_end(key))
+        self.driver_ids = {name: index for name, index in self.driver_ids.items() if name != driver}
+        if not self.banned[driver_id]:
+            self.driver_count -= 1
+
+    def balance_penalty(self):
+        driver_count = max(1, self.driver_count)
+        mean = self.worked_total / driver_count
+        variance = max(0, self.worked_squares / driver_count - mean * mean)
+        return BALANCE_WEIGHT * variance ** 0.5 / 60
+
+    def penalty(self):
+        return CONFLICT_PENALTY * self.conflicts + LATE_PENALTY * self.late_trips + OVERTIME_PENALTY_PER_MINUTE * self.overtime + WEEKEND_PENALTY * self.banned_trips
+
+    def violation_count(self):
+        return self.conflicts + self.late_trips + self.overtime_drivers + self.banned_trips + self.unknown_trips
+
+    def is_feasible(self):
+        return self.violation_count() == 0
+
+    def is_complete(self):
+        return self.is_feasible() and self.trip_count >= self.num_routes
+
+    def score(self):
+        covered = min(self.trip_count, self.num_routes)
+        return COVERAGE_WEIGHT * covered - self.penalty() - UNKNOWN_DRIVER_PENALTY * self.unknown_trips - self.balance_penalty()
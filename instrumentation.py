@@ -0,0 +1,134 @@
+import csv
+import json
+import time
+from collections import Counter, defaultdict
+
+HISTOGRAM_BOUNDS_MS = [0.1, 1, 10, 100, 1000, 10000]
+COUNTER_LABELS = {
+    'can_assign_route.calls': "Проверок can_assign_route",
+    'can_assign_route.accepted': "Проверок пройдено",
+    'reject.overlap': "Отказов: пересечение рейсов",
+    'reject.min_break': "Отказов: короткий перерыв",
+    'reject.shift_hours': "Отказов: превышение смены",
+    'reject.end_of_day': "Отказов: после конца дня",
+    'excluded.weekend_type_a': "Исключено водителей A в выходной",
+    'allocate.calls': "Вызовов allocate_driver_to_route",
+    'allocate.attempts': "Попыток подбора слота",
+    'allocate.failures': "Неудачных подборов",
+    'find_free_periods.calls': "Вызовов find_free_periods",
+    'dispatch.deferred': "Отложено водителей (мало часов)",
+    'ga.generations': "Поколений ГА",
+    'cache.hits': "Взято из кэша целиком",
+    'warm_start.kept': "Рейсов взято из кэша",
+    'warm_start.dropped': "Рейсов из кэша отброшено",
+    'repair.reassigned': "Рейсов переназначено",
+    'repair.unassigned': "Рейсов без водителя после правки",
+    'week.retried_days': "Дней недели пересчитано с резервом",
+    'network.overflow': "Рейсов сети за пределами рабочего дня",
+    'island.epochs': "Эпох островной модели (между миграциями)",
+    'local.iterations': "Итераций локального поиска",
+    'local.accepted': "Принятых ходов локального поиска",
+    'local.improved': "Улучшений лучшего расписания"
+}
+TIMING_LABELS = {
+    'run.total': "Общее время",
+    'ga.population': "Начальная популяция",
+    'ga.generation': "Поколение ГА",
+    'island.epoch': "Эпоха островной модели"
+}
+
+
+class Timer:
+    __slots__ = ('stats', 'name', 'started')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record_time(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class RunStats:
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = defaultdict(list)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_time(self, name, seconds):
+        self.timings[name].append(seconds)
+
+    def timer(self, name):
+        return Timer(self, name)
+
+    def timing_summary(self, name):
+        samples = sorted(self.timings[name])
+        if not samples:
+            return None
+        histogram = Counter()
+        for seconds in samples:
+            milliseconds = seconds * 1000
+            bucket = next((f"<{bound}ms" for bound in HISTOGRAM_BOUNDS_MS if milliseconds < bound), f">={HISTOGRAM_BOUNDS_MS[-1]}ms")
+            histogram[bucket] += 1
+        return {
+            'count': len(samples),
+            'total': sum(samples),
+            'mean': sum(samples) / len(samples),
+            'min': samples[0],
+            'p50': samples[len(samples) // 2],
+            'p90': samples[min(len(samples) - 1, len(samples) * 9 // 10)],
+            'max': samples[-1],
+            'histogram': dict(histogram)
+        }
+
+    def summary(self):
+        return {
+            'counters': dict(self.counters),
+            'timings': {name: self.timing_summary(name) for name in self.timings}
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding='utf-8') as output:
+            json.dump(self.summary(), output, ensure_ascii=False, indent=2)
+
+    def write_csv(self, path):
+        summary = self.summary()
+        with open(path, "w", newline='', encoding='utf-8') as output:
+            writer = csv.writer(output)
+            writer.writerow(['metric', 'field', 'value'])
+            for name, value in sorted(summary['counters'].items()):
+                writer.writerow([name, 'count', value])
+            for name, timing in sorted(summary['timings'].items()):
+                for field in ('count', 'total', 'mean', 'min', 'p50', 'p90', 'max'):
+                    writer.writerow([name, field, timing[field]])
+                for bucket, count in timing['histogram'].items():
+                    writer.writerow([name, f"histogram{bucket}", count])
+
+    def write(self, path):
+        if path.lower().endswith('.csv'):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+    def summary_lines(self):
+        lines = []
+        for name, label in COUNTER_LABELS.items():
+            if self.counters.get(name):
+                lines.append(f"{label}: {self.counters[name]}")
+        for name, label in TIMING_LABELS.items():
+            timing = self.timing_summary(name)
+            if timing is None:
+                continue
+            if timing['count'] == 1:
+                lines.append(f"{label}: {timing['total'] * 1000:.1f} мс")
+            else:
+                lines.append(f"{label}: {timing['count']} × {timing['mean'] * 1000:.1f} мс (макс. {timing['max'] * 1000:.1f} мс)")
+        return lines
@@ -0,0 +1,159 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from parallel_ga import init_worker
+import parallel_ga
+from schedule_engine import ScheduleEngine, ScheduleResult
+
+TOURNAMENT_SIZE = 3
+MIN_MUTATION_RATE = 0.02
+MAX_MUTATION_RATE = 0.5
+MUTATION_DECAY = 0.85
+MUTATION_GROWTH = 1.3
+IMPROVEMENT_TOLERANCE = 1e-6
+
+
+def tournament(engine, population):
+    return max(engine.rng.sample(population, min(TOURNAMENT_SIZE, len(population))), key=lambda x: x['fitness'])
+
+
+def segment_child(engine, parent, donor, first, last):
+    parent_schedule = parent['schedule']
+    donor_schedule = donor['schedule']
+    schedule = parent_schedule[:first] + donor_schedule[first:last] + parent_schedule[last:]
+    evaluator = parent['evaluator'].copy()
+    for index in range(first, last):
+        evaluator.replace_interval(parent_schedule.interval(index), donor_schedule.interval(index))
+    return engine.make_individual(schedule, evaluator)
+
+
+def two_point_crossover(engine, parent1, parent2):
+    length = min(len(parent1['schedule']), len(parent2['schedule']))
+    if length < 2:
+        return parent1, parent2
+    first, last = sorted(engine.rng.sample(range(length + 1), 2))
+    return segment_child(engine, parent1, parent2, first, last), segment_child(engine, parent2, parent1, first, last)
+
+
+def evolve_island(population, seed, population_size, generations, elite, mutation_rate, adaptive, stop_when_complete, request=None):
+    if request is None:
+        request = parallel_ga._worker_request
+    engine = ScheduleEngine(request, random.Random(seed))
+    driver_list = request.all_drivers
+    population = sorted(population, key=lambda x: x['fitness'], reverse=True)
+    while len(population) < population_size and not (stop_when_complete and population and population[0]['complete']):
+        schedule, score = engine.generate_genetic_schedule_attempt(driver_list, request.num_routes)
+        population.append(engine.make_individual(schedule))
+        population.sort(key=lambda x: x['fitness'], reverse=True)
+    best_fitness = population[0]['fitness']
+    for _ in range(generations):
+        if stop_when_complete and population[0]['complete']:
+            break
+        next_population = population[:elite]
+        while len(next_population) < population_size:
+            children = two_point_crossover(engine, tournament(engine, population), tournament(engine, population))
+            for child in children:
+                if engine.rng.random() < mutation_rate:
+                    child = engine.mutate_individual(child, driver_list)
+                next_population.append(child)
+        population = sorted(next_population[:population_size], key=lambda x: x['fitness'], reverse=True)
+        if adaptive:
+            if population[0]['fitness'] > best_fitness + IMPROVEMENT_TOLERANCE:
+                mutation_rate = max(MIN_MUTATION_RATE, mutation_rate * MUTATION_DECAY)
+            else:
+                mutation_rate = min(MAX_MUTATION_RATE, mutation_rate * MUTATION_GROWTH)
+        best_fitness = max(best_fitness, population[0]['fitness'])
+    return population, mutation_rate
+
+
+class InlineExecutor:
+    def __init__(self, request):
+        self.request = request
+
+    def map(self, function, *iterables):
+        return map(partial(function, request=self.request), *iterables)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class IslandGeneticAlgorithm:
+    def __init__(self, request, islands=4, island_size=20, migration_interval=5, migrants=2, elite=2, workers=None, seed=None, adaptive=True, patience=3, stop_when_complete=True, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.islands = max(1, islands)
+        self.island_size = max(2, island_size)
+        self.migration_interval = max(1, migration_interval)
+        self.migrants = min(migrants, self.island_size - 1)
+        self.elite = min(elite, self.island_size - 1)
+        self.workers = min(self.islands, workers or os.cpu_count() or 1)
+        self.seed = seed
+        self.adaptive = adaptive
+        self.patience = max(1, patience)
+        self.stop_when_complete = stop_when_complete
+        self.engine = ScheduleEngine(request, progress=progress, cancel_event=cancel_event, stats=stats)
+
+    def executor(self):
+        if self.workers <= 1:
+            return InlineExecutor(self.request)
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(self.request,))
+
+    def migrate(self, populations):
+        if self.islands < 2 or not self.migrants:
+            return populations
+        emigrants = [population[:self.migrants] for population in populations]
+        migrated = []
+        for index, population in enumerate(populations):
+            arrivals = emigrants[index - 1]
+            migrated.append(population[:len(population) - len(arrivals)] + arrivals)
+        return migrated
+
+    def run(self, generations=100, mutation_rate=0.1, warm_start=None):
+        engine = self.engine
+        failure = engine.check_genetic_inputs()
+        if failure:
+            return ScheduleResult(failure=failure)
+        rng = random.Random(self.seed)
+        populations = [[] for _ in range(self.islands)]
+        if warm_start:
+            populations[0] = [engine.warm_start_individual(warm_start, self.request.all_drivers, self.request.num_routes)]
+        rates = [mutation_rate] * self.islands
+        best = None
+        stalled = 0
+        done = 0
+        cancelled = False
+        with self.executor() as pool:
+            while done < generations:
+                started = time.perf_counter()
+                epoch = min(self.migration_interval, generations - done)
+                seeds = [rng.getrandbits(64) for _ in range(self.islands)]
+                outcomes = list(pool.map(
+                    evolve_island, populations, seeds,
+                    [self.island_size] * self.islands, [epoch] * self.islands, [self.elite] * self.islands,
+                    rates, [self.adaptive] * self.islands, [self.stop_when_complete] * self.islands
+                ))
+                populations = [population for population, rate in outcomes]
+                rates = [rate for population, rate in outcomes]
+                done += epoch
+                epoch_best = max((population[0] for population in populations), key=lambda x: x['fitness'])
+                if best is None or epoch_best['fitness'] > best['fitness'] + IMPROVEMENT_TOLERANCE:
+                    best = epoch_best
+                    stalled = 0
+                else:
+                    stalled += 1
+                if engine.stats is not None:
+                    engine.stats.count('ga.generations', epoch)
+                    engine.stats.count('island.epochs')
+                    engine.stats.record_time('island.epoch', time.perf_counter() - started)
+                engine.report_progress(done, generations)
+                if stalled >= self.patience or (self.stop_when_complete and best['complete']):
+                    break
+                if engine.is_cancelled():
+                    cancelled = True
+                    break
+                populations = self.migrate(populations)
+        return engine.genetic_result(best, cancelled)
@@ -0,0 +1,229 @@
+import math
+import random
+import time
+from collections import defaultdict
+from fitness import ScheduleEvaluator
+from schedule_engine import ScheduleEngine, ScheduleResult
+from timeline import DriverTimeline, SERVICE_END, make_trip
+
+CHECK_EVERY = 256
+START_TEMPERATURE = 5.0
+END_TEMPERATURE = 0.01
+MAX_SHIFT = 15
+IMPROVEMENT_TOLERANCE = 1e-9
+SEED_SHARE = 0.5
+
+
+class SeedDeadline:
+    def __init__(self, deadline, cancel_event=None):
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+
+    def is_set(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return True
+        return time.perf_counter() >= self.deadline
+
+
+class LocalSearchOptimizer:
+    def __init__(self, request, time_budget=2.0, seed=None, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.time_budget = time_budget
+        self.engine = ScheduleEngine(request, random.Random(seed), progress=progress, cancel_event=cancel_event, stats=stats)
+        self.rng = self.engine.rng
+
+    def initial_schedule(self, deadline, warm_start=None):
+        engine = self.engine
+        seed_engine = ScheduleEngine(self.request, self.rng, cancel_event=SeedDeadline(deadline, engine.cancel_event), stats=engine.stats)
+        result = seed_engine.build_optimized_timetable(warm_start=warm_start)
+        if engine.is_cancelled() or (result.failure and not result.schedule):
+            return None, result
+        return result.schedule, None
+
+    def load(self, schedule):
+        request = self.request
+        self.drivers = request.eligible_drivers(request.all_drivers)
+        self.shift_limits = request.shift_limits(self.drivers)
+        self.timelines = {driver: DriverTimeline() for driver in self.drivers}
+        self.trips = [trip for trip in schedule if trip.driver in self.timelines]
+        for trip in self.trips:
+            self.timelines[trip.driver].add(trip.start, trip.end)
+        self.evaluator = ScheduleEvaluator(request, self.trips)
+        self.missing = []
+        for index in range(request.num_routes - len(self.trips)):
+            route_type = request.route_options[index % len(request.route_options)]
+            self.missing.append((f"{route_type} (доп рейс)", request.route_time(route_type)))
+
+    def fits(self, driver, start, duration):
+        return self.engine.can_assign_route(start, duration, self.timelines[driver], self.shift_limits[driver], self.request.min_break_time)
+
+    def move_trip(self, index, driver, start):
+        trip = self.trips[index]
+        duration = trip.end - trip.start
+        self.timelines[trip.driver].remove(trip.start, trip.end)
+        if not self.fits(driver, start, duration):
+            self.timelines[trip.driver].add(trip.start, trip.end)
+            return None
+        moved = make_trip(driver, trip.route_type, start, start + duration, trip.route_number)
+        self.timelines[driver].add(start, start + duration)
+        self.evaluator.replace_trip(trip, moved)
+        self.trips[index] = moved
+        return trip
+
+    def undo_move(self, index, previous):
+        trip = self.trips[index]
+        self.timelines[trip.driver].remove(trip.start, trip.end)
+        if previous is None:
+            self.evaluator.remove_trip(trip)
+            del self.trips[index]
+            self.missing.append((trip.route_type, trip.end - trip.start))
+            return
+        self.timelines[previous.driver].add(previous.start, previous.end)
+        self.evaluator.replace_trip(trip, previous)
+        self.trips[index] = previous
+
+    def try_reassign(self):
+        index = self.rng.randrange(len(self.trips))
+        driver = self.rng.choice(self.drivers)
+        if driver == self.trips[index].driver:
+            return None
+        previous = self.move_trip(index, driver, self.trips[index].start)
+        return None if previous is None else [(index, previous)]
+
+    def try_shift(self):
+        index = self.rng.randrange(len(self.trips))
+        trip = self.trips[index]
+        start = trip.start + self.rng.randint(-MAX_SHIFT, MAX_SHIFT)
+        if start < 0 or start + trip.end - trip.start > SERVICE_END or start == trip.start:
+            return None
+        previous = self.move_trip(index, trip.driver, start)
+        return None if previous is None else [(index, previous)]
+
+    def try_swap(self):
+        first = self.rng.randrange(len(self.trips))
+        second = self.rng.randrange(len(self.trips))
+        first_driver = self.trips[first].driver
+        second_driver = self.trips[second].driver
+        if first_driver == second_driver:
+            return None
+        first_previous = self.move_trip(first, second_driver, self.trips[first].start)
+        if first_previous is None:
+            return None
+        second_previous = self.move_trip(second, first_driver, self.trips[second].start)
+        if second_previous is None:
+            self.undo_move(first, first_previous)
+            return None
+        return [(first, first_previous), (second, second_previous)]
+
+    def try_insert(self):
+        route_type, duration = self.missing[-1]
+        start = self.rng.randint(0, SERVICE_END - duration)
+        driver = self.rng.choice(self.drivers)
+        if not self.fits(driver, start, duration):
+            return None
+        trip = make_trip(driver, route_type, start, start + duration, 0)
+        self.timelines[driver].add(start, start + duration)
+        self.evaluator.add_trip(trip)
+        self.trips.append(trip)
+        self.missing.pop()
+        return [(len(self.trips) - 1, None)]
+
+    def propose(self):
+        if self.missing and self.rng.random() < 0.5:
+            return self.try_insert()
+        if not self.trips:
+            return None
+        roll = self.rng.random()
+        if roll < 0.5:
+            return self.try_reassign()
+        if roll < 0.8:
+            return self.try_swap()
+        return self.try_shift()
+
+    def finished_schedule(self, trips):
+        by_driver = defaultdict(list)
+        for index, trip in enumerate(trips):
+            by_driver[trip.driver].append(index)
+        schedule = list(trips)
+        for indices in by_driver.values():
+            indices.sort(key=lambda index: schedule[index].start)
+            for route_number, index in enumerate(indices, start=1):
+                if schedule[index].route_number != route_number:
+                    schedule[index] = schedule[index].replace(route_number=route_number)
+        return schedule
+
+    def best_before(self, undo):
+        best_trips = list(self.trips)
+        for index, previous in reversed(undo):
+            if previous is None:
+                del best_trips[index]
+            else:
+                best_trips[index] = previous
+        return best_trips
+
+    def run(self, warm_start=None, initial=None):
+        engine = self.engine
+        started = time.perf_counter()
+        if initial is None:
+            initial, stopped = self.initial_schedule(started + SEED_SHARE * self.time_budget, warm_start)
+            if stopped is not None:
+                return stopped
+        self.load(initial)
+        current_score = self.evaluator.score()
+        best_score = current_score
+        best_trips = None
+        iterations = 0
+        accepted = 0
+        improved = 0
+        deadline = started + self.time_budget
+        temperature = START_TEMPERATURE
+        cancelled = False
+        searching = bool(self.missing) or len(self.drivers) > 1
+        while searching:
+            if iterations % CHECK_EVERY == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if engine.is_cancelled():
+                    cancelled = True
+                    break
+                progress = (now - started) / self.time_budget
+                temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+                engine.report_progress(int(progress * 100), 100)
+            iterations += 1
+            undo = self.propose()
+            if undo is None:
+                continue
+            score = self.evaluator.score()
+            delta = score - current_score
+            if delta < 0 and self.rng.random() >= math.exp(delta / temperature):
+                for index, previous in reversed(undo):
+                    self.undo_move(index, previous)
+                continue
+            accepted += 1
+            if delta < 0 and best_trips is None:
+                best_trips = self.best_before(undo)
+            current_score = score
+            if score > best_score - IMPROVEMENT_TOLERANCE:
+                if score > best_score + IMPROVEMENT_TOLERANCE:
+                    improved += 1
+                best_score = max(best_score, score)
+                best_trips = None
+        if engine.stats is not None:
+            engine.stats.count('local.iterations', iterations)
+            engine.stats.count('local.accepted', accepted)
+            engine.stats.count('local.improved', improved)
+        if best_trips is None:
+            best_trips = self.trips
+        return self.search_result(self.finished_schedule(best_trips), iterations, cancelled)
+
+    def search_result(self, schedule, iterations, cancelled):
+        evaluator = ScheduleEvaluator(self.request, schedule)
+        fitness = evaluator.score()
+        violations = evaluator.violation_count()
+        if len(schedule) < self.request.num_routes:
+            message = f"Расписание не утверждено: размещено {len(schedule)} из {self.request.num_routes} рейсов.\nНужно добавить сотрудников или уменьшить число рейсов."
+            return ScheduleResult(schedule=schedule, failure=message, fitness=fitness, violations=violations, cancelled=cancelled)
+        prefix = "Локальный поиск остановлен" if cancelled else "Локальный поиск завершён"
+        title = f"{prefix} ({len(schedule)} рейсов, итераций: {iterations}):"
+        return ScheduleResult(schedule=schedule, title=title, fitness=fitness, violations=violations, cancelled=cancelled)
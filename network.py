@@ -0,0 +1,67 @@
+import heapq
+from dataclasses import dataclass, replace
+from dispatcher import HeapDispatcher
+from timeline import SERVICE_END
+
+
+@dataclass
+class Line:
+    name: str
+    duration: int
+    trips: int
+    headway: int = 0
+    first_departure: int = 0
+
+    def departures(self):
+        if self.trips <= 0:
+            return
+        headway = self.headway
+        if not headway:
+            headway = max(1, (SERVICE_END - self.duration - self.first_departure) // max(1, self.trips - 1))
+        for index in range(self.trips):
+            yield self.first_departure + index * headway
+
+
+def line_trips(line):
+    return ((start, line.duration, line.name) for start in line.departures())
+
+
+def build_network_demand(lines):
+    trips = []
+    overflow = 0
+    for start, duration, name in heapq.merge(*(line_trips(line) for line in lines)):
+        if start + duration > SERVICE_END:
+            overflow += 1
+        else:
+            trips.append((start, duration, name))
+    return trips, overflow
+
+
+def network_request(request, lines):
+    total_trips = sum(line.trips for line in lines)
+    total_minutes = sum(line.trips * line.duration for line in lines)
+    return replace(
+        request,
+        num_routes=total_trips,
+        travel_duration_minutes=max(1, round(total_minutes / max(1, total_trips))),
+        route_options=[line.name for line in lines]
+    )
+
+
+class NetworkScheduler:
+    def __init__(self, request, lines, progress=None, cancel_event=None, stats=None):
+        self.lines = lines
+        self.request = network_request(request, lines)
+        self.dispatcher = HeapDispatcher(self.request, progress=progress, cancel_event=cancel_event, stats=stats)
+
+    def run(self):
+        trips, overflow = build_network_demand(self.lines)
+        if self.dispatcher.engine.stats is not None and overflow:
+            self.dispatcher.engine.stats.count('network.overflow', overflow)
+        result = self.dispatcher.run(trips)
+        if result.ok and not result.cancelled and result.schedule:
+            details = f"линий: {len(self.lines)}, рейсов: {len(result.schedule)}"
+            if overflow:
+                details += f", не помещается в рабочий день: {overflow}"
+            result.title = f"Расписание сети ({details}):"
+        return result
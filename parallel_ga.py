@@ -0,0 +1,109 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from schedule_engine import ScheduleEngine, ScheduleResult
+
+_worker_request = None
+
+
+def init_worker(request):
+    global _worker_request
+    _worker_request = request
+
+
+def build_individuals(seeds):
+    individuals = []
+    for seed in seeds:
+        engine = ScheduleEngine(_worker_request, random.Random(seed))
+        schedule, score = engine.generate_genetic_schedule_attempt(_worker_request.all_drivers, _worker_request.num_routes)
+        individuals.append(engine.make_individual(schedule))
+    return individuals
+
+
+def breed_children(parents, pairs, seed, mutation_rate):
+    engine = ScheduleEngine(_worker_request, random.Random(seed))
+    driver_list = _worker_request.all_drivers
+    children = []
+    for first, second in pairs:
+        for child in engine.crossover_individuals(parents[first], parents[second]):
+            if engine.rng.random() < mutation_rate:
+                child = engine.mutate_individual(child, driver_list)
+            children.append(child)
+    return children
+
+
+def split_batches(items, batch_count):
+    batch_count = max(1, min(batch_count, len(items)))
+    size, extra = divmod(len(items), batch_count)
+    batches = []
+    start = 0
+    for index in range(batch_count):
+        end = start + size + (1 if index < extra else 0)
+        batches.append(items[start:end])
+        start = end
+    return batches
+
+
+class ParallelGeneticAlgorithm:
+    def __init__(self, request, workers=None, seed=None, batches_per_worker=1, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.batches_per_worker = batches_per_worker
+        self.engine = ScheduleEngine(request, progress=progress, cancel_event=cancel_event, stats=stats)
+
+    def batch_count(self):
+        return self.workers * self.batches_per_worker
+
+    def build_population(self, pool, rng, population_size):
+        seeds = [rng.getrandbits(64) for _ in range(population_size)]
+        population = []
+        for individuals in pool.map(build_individuals, split_batches(seeds, self.batch_count())):
+            population.extend(individuals)
+        return population
+
+    def breed(self, pool, rng, parents, children_needed, mutation_rate):
+        pairs = [tuple(rng.sample(range(len(parents)), 2)) for _ in range((children_needed + 1) // 2)]
+        futures = []
+        for batch in split_batches(pairs, self.batch_count()):
+            used = sorted({index for pair in batch for index in pair})
+            local_index = {index: position for position, index in enumerate(used)}
+            local_parents = [parents[index] for index in used]
+            local_pairs = [(local_index[first], local_index[second]) for first, second in batch]
+            futures.append(pool.submit(breed_children, local_parents, local_pairs, rng.getrandbits(64), mutation_rate))
+        children = []
+        for future in futures:
+            children.extend(future.result())
+        return children[:children_needed]
+
+    def run(self, generations=50, population_size=20, mutation_rate=0.1):
+        engine = self.engine
+        failure = engine.check_genetic_inputs()
+        if failure:
+            return ScheduleResult(failure=failure)
+        rng = random.Random(self.seed)
+        best = None
+        cancelled = False
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(self.request,)) as pool:
+            started = time.perf_counter()
+            population = self.build_population(pool, rng, population_size)
+            if engine.stats is not None:
+                engine.stats.record_time('ga.population', time.perf_counter() - started)
+            for generation in range(generations):
+                started = time.perf_counter()
+                population.sort(key=lambda x: x['fitness'], reverse=True)
+                current_best = population[0]
+                if best is None or current_best['fitness'] > best['fitness']:
+                    best = current_best
+                engine.report_progress(generation + 1, generations)
+                if best['complete']:
+                    break
+                if engine.is_cancelled():
+                    cancelled = True
+                    break
+                parents = population[:population_size // 2]
+                children = self.breed(pool, rng, parents, population_size - len(parents), mutation_rate)
+                population = parents + children
+                engine.record_generation(started)
+        return engine.genetic_result(best, cancelled)
@@ -0,0 +1,270 @@
+import csv
+import json
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from itertools import islice
+from network import Line
+from timeline import DAY_COLUMN, SCHEDULE_COLUMNS, clock_to_minutes, make_trip, minutes_to_clock
+
+CATEGORY_ALIASES = {'A': 'A', 'B': 'B', 'А': 'A', 'В': 'B'}
+NAME_HEADERS = {'name', 'driver', 'имя', 'водитель'}
+LINE_HEADERS = {'line', 'name', 'линия', 'маршрут'}
+LINE_FIELDS = ('name', 'duration', 'trips', 'headway', 'first_departure')
+CATEGORY_HEADERS = {'category', 'type', 'категория', 'тип'}
+EXPORT_CHUNK_ROWS = 4096
+COLUMNAR_MAGIC = b'SIAODCOL1\n'
+COLUMNAR_BLOCK = struct.Struct('<II')
+
+
+@dataclass
+class RosterImport:
+    type_a_drivers: list = field(default_factory=list)
+    type_b_drivers: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    conflicts: list = field(default_factory=list)
+    rejected: list = field(default_factory=list)
+
+    @property
+    def imported(self):
+        return len(self.type_a_drivers) + len(self.type_b_drivers)
+
+    def summary(self):
+        parts = [f"добавлено водителей: {self.imported} (A: {len(self.type_a_drivers)}, B: {len(self.type_b_drivers)})"]
+        if self.duplicates:
+            parts.append(f"повторов пропущено: {len(self.duplicates)}")
+        if self.conflicts:
+            parts.append(f"с другой категорией: {len(self.conflicts)}")
+        if self.rejected:
+            parts.append(f"отклонено строк: {len(self.rejected)}")
+        return ", ".join(parts)
+
+
+def normalize_category(value):
+    return CATEGORY_ALIASES.get(str(value).strip().upper())
+
+
+def read_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as roster_file:
+        for line_number, row in enumerate(csv.reader(roster_file), start=1):
+            if not row or not row[0].strip():
+                continue
+            if line_number == 1 and row[0].strip().lower() in NAME_HEADERS:
+                continue
+            yield line_number, row[0], row[1] if len(row) > 1 else "A"
+
+
+def read_json_rows(path):
+    with open(path, encoding='utf-8-sig') as roster_file:
+        return json_roster_rows(json.load(roster_file))
+
+
+def json_roster_rows(data):
+    if isinstance(data, dict):
+        position = 0
+        for category, names in data.items():
+            for name in names:
+                position += 1
+                yield position, name, category
+        return
+    for position, item in enumerate(data, start=1):
+        if isinstance(item, dict):
+            name = next((item[key] for key in item if key.lower() in NAME_HEADERS), None)
+            category = next((item[key] for key in item if key.lower() in CATEGORY_HEADERS), "A")
+            yield position, name, category
+        elif isinstance(item, (list, tuple)) and item:
+            yield position, item[0], item[1] if len(item) > 1 else "A"
+        else:
+            yield position, item, "A"
+
+
+def read_roster_rows(path):
+    if path.lower().endswith('.json'):
+        return read_json_rows(path)
+    return read_csv_rows(path)
+
+
+def import_roster(path, type_a_drivers=(), type_b_drivers=()):
+    return collect_roster(read_roster_rows(path), type_a_drivers, type_b_drivers)
+
+
+def collect_roster(rows, type_a_drivers=(), type_b_drivers=()):
+    known = dict.fromkeys(type_a_drivers, 'A')
+    known.update(dict.fromkeys(type_b_drivers, 'B'))
+    result = RosterImport()
+    added = {'A': result.type_a_drivers, 'B': result.type_b_drivers}
+    for position, name, category in rows:
+        if not isinstance(name, str) or not name.strip() or '\n' in name:
+            result.rejected.append((position, "пустое или некорректное имя"))
+            continue
+        name = sys.intern(" ".join(name.split()))
+        driver_type = normalize_category(category)
+        if driver_type is None:
+            result.rejected.append((position, f"неизвестная категория '{category}'"))
+            continue
+        known_type = known.get(name)
+        if known_type == driver_type:
+            result.duplicates.append(name)
+        elif known_type is not None:
+            result.conflicts.append(name)
+        else:
+            known[name] = driver_type
+            added[driver_type].append(name)
+    return result
+
+
+def read_line_rows(path):
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8-sig') as lines_file:
+            for position, item in enumerate(json.load(lines_file), start=1):
+                if isinstance(item, dict):
+                    yield position, [item.get(field) for field in LINE_FIELDS]
+                else:
+                    yield position, list(item)
+        return
+    with open(path, newline='', encoding='utf-8-sig') as lines_file:
+        for line_number, row in enumerate(csv.reader(lines_file), start=1):
+            if not row or not row[0].strip():
+                continue
+            if line_number == 1 and row[0].strip().lower() in LINE_HEADERS:
+                continue
+            yield line_number, row
+
+
+def parse_line(values):
+    values = list(values) + [None] * (len(LINE_FIELDS) - len(values))
+    name, duration, trips, headway, first_departure = values[:len(LINE_FIELDS)]
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("пустое название линии")
+    try:
+        duration = int(duration)
+        trips = int(trips)
+        headway = int(headway) if headway not in (None, "") else 0
+        if isinstance(first_departure, str) and ":" in first_departure:
+            first_departure = clock_to_minutes(first_departure.strip())
+        else:
+            first_departure = int(first_departure) if first_departure not in (None, "") else 0
+    except (TypeError, ValueError):
+        raise ValueError("длительность, число рейсов и интервал должны быть целыми числами, первый рейс - ЧЧ:ММ")
+    if duration <= 0 or trips < 0 or headway < 0:
+        raise ValueError("длительность должна быть больше нуля, число рейсов и интервал - не меньше нуля")
+    return Line(" ".join(name.split()), duration, trips, headway, first_departure)
+
+
+def import_lines(path):
+    lines = {}
+    rejected = []
+    for position, values in read_line_rows(path):
+        try:
+            line = parse_line(values)
+        except ValueError as error:
+            rejected.append((position, str(error)))
+            continue
+        if line.name in lines:
+            rejected.append((position, f"линия '{line.name}' уже описана"))
+            continue
+        lines[line.name] = line
+    return list(lines.values()), rejected
+
+
+def iter_chunks(trips, size=EXPORT_CHUNK_ROWS):
+    iterator = iter(trips)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CsvScheduleWriter:
+    def __init__(self, output, with_day=False):
+        self.writer = csv.writer(output)
+        self.with_day = with_day
+        self.rows = 0
+        self.writer.writerow(([DAY_COLUMN] if with_day else []) + SCHEDULE_COLUMNS)
+
+    def write(self, trips, day=None):
+        with_day = self.with_day
+        for chunk in iter_chunks(trips):
+            self.writer.writerows(
+                ((trip.day or day,) if with_day else ()) + (trip.driver, trip.route_type, minutes_to_clock(trip.start), minutes_to_clock(trip.end), trip.route_number)
+                for trip in chunk
+            )
+            self.rows += len(chunk)
+        return self.rows
+
+
+class ColumnarScheduleWriter:
+    def __init__(self, output):
+        self.output = output
+        self.string_ids = {}
+        self.rows = 0
+        output.write(COLUMNAR_MAGIC)
+
+    def intern(self, value, new_strings):
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = self.string_ids[value] = len(self.string_ids)
+            new_strings.append(value)
+        return string_id
+
+    def write(self, trips, day=None):
+        for chunk in iter_chunks(trips):
+            new_strings = []
+            days = array('I', [self.intern(trip.day or day or "", new_strings) for trip in chunk])
+            drivers = array('I', [self.intern(trip.driver, new_strings) for trip in chunk])
+            route_types = array('I', [self.intern(trip.route_type, new_strings) for trip in chunk])
+            starts = array('H', [trip.start for trip in chunk])
+            ends = array('H', [trip.end for trip in chunk])
+            route_numbers = array('H', [trip.route_number for trip in chunk])
+            strings = json.dumps(new_strings, ensure_ascii=False).encode('utf-8')
+            self.output.write(COLUMNAR_BLOCK.pack(len(strings), len(chunk)))
+            self.output.write(strings)
+            for column in (days, drivers, route_types, starts, ends, route_numbers):
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                column.tofile(self.output)
+            self.rows += len(chunk)
+        return self.rows
+
+
+def read_columnar_chunks(path):
+    strings = []
+    with open(path, 'rb') as source:
+        if source.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path}: неизвестный формат файла расписания")
+        while True:
+            header = source.read(COLUMNAR_BLOCK.size)
+            if not header:
+                return
+            strings_length, rows = COLUMNAR_BLOCK.unpack(header)
+            strings.extend(json.loads(source.read(strings_length).decode('utf-8')))
+            columns = []
+            for typecode in ('I', 'I', 'I', 'H', 'H', 'H'):
+                column = array(typecode)
+                column.fromfile(source, rows)
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                columns.append(column)
+            days, drivers, route_types, starts, ends, route_numbers = columns
+            yield [
+                (strings[days[row]], make_trip(strings[drivers[row]], strings[route_types[row]], starts[row], ends[row], route_numbers[row]))
+                for row in range(rows)
+            ]
+
+
+def open_schedule_writer(path, with_day=False):
+    if path.lower().endswith('.scol'):
+        output = open(path, 'wb')
+        return output, ColumnarScheduleWriter(output)
+    output = open(path, 'w', newline='', encoding='utf-8')
+    return output, CsvScheduleWriter(output, with_day=with_day)
+
+
+def export_schedule(path, trips, day=None, with_day=None):
+    if with_day is None:
+        with_day = day is not None
+    output, writer = open_schedule_writer(path, with_day=with_day)
+    with output:
+        return writer.write(trips, day)
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from schedule_engine import DAYS, ScheduleResult
+from timeline import trip_from_dict
+
+CACHE_ENTRIES = 32
+CACHE_TRIPS = 200000
+DISK_ENTRIES = 128
+NEAR_DRIVER_CHANGES = 10
+NEAR_ROUTE_SHARE = 0.25
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".siaod_cache")
+INDEX_FILE = "index.json"
+WEEK_PREFIX = "week-"
+
+
+def request_settings(request):
+    return {
+        'travel_duration_minutes': request.travel_duration_minutes,
+        'selected_day': request.selected_day,
+        'shift_duration_a': request.shift_duration_a,
+        'shift_duration_b': request.shift_duration_b,
+        'break_time': request.break_time,
+        'min_break_time': request.min_break_time,
+        'route_options': list(request.route_options)
+    }
+
+
+def request_fingerprint(request, engine_name):
+    key = {
+        'engine': engine_name,
+        'settings': request_settings(request),
+        'type_a_drivers': sorted(request.type_a_drivers),
+        'type_b_drivers': sorted(request.type_b_drivers),
+        'num_routes': request.num_routes
+    }
+    return hashlib.sha256(json.dumps(key, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    fingerprint: str
+    engine_name: str
+    settings: dict
+    type_a_drivers: list
+    type_b_drivers: list
+    num_routes: int
+    schedule: list = field(default_factory=list)
+    title: str = ""
+    fitness: float = 0
+    violations: int = 0
+    complete: bool = False
+    used: float = 0
+
+    def meta(self):
+        return {
+            'engine_name': self.engine_name,
+            'settings': self.settings,
+            'type_a_drivers': self.type_a_drivers,
+            'type_b_drivers': self.type_b_drivers,
+            'num_routes': self.num_routes,
+            'complete': self.complete,
+            'used': self.used
+        }
+
+    def distance(self, request):
+        if self.settings != request_settings(request):
+            return None
+        changes = len(set(self.type_a_drivers).symmetric_difference(request.type_a_drivers))
+        changes += len(set(self.type_b_drivers).symmetric_difference(request.type_b_drivers))
+        route_change = abs(self.num_routes - request.num_routes)
+        if changes > NEAR_DRIVER_CHANGES or route_change > NEAR_ROUTE_SHARE * max(1, request.num_routes):
+            return None
+        return changes + route_change / max(1, request.num_routes)
+
+    def result(self):
+        return ScheduleResult(schedule=list(self.schedule), title=self.title, fitness=self.fitness, violations=self.violations)
+
+
+class ScheduleCache:
+    def __init__(self, max_entries=CACHE_ENTRIES, max_trips=CACHE_TRIPS, directory=None, max_disk_entries=DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_trips = max_trips
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.trips = 0
+        self.disk_index = {}
+        if directory is not None:
+            self.disk_index = self.read_index()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, request, engine_name):
+        fingerprint = request_fingerprint(request, engine_name)
+        entry = self.entries.get(fingerprint)
+        if entry is None and self.disk_index.get(fingerprint, {}).get('complete'):
+            entry = self.load_entry(fingerprint)
+            if entry is not None:
+                self.remember(entry)
+        if entry is None or not entry.complete:
+            return None
+        self.entries.move_to_end(fingerprint)
+        self.touch(entry)
+        return entry.result()
+
+    def put(self, request, engine_name, result):
+        if result.cancelled or not result.schedule:
+            return
+        days = len(DAYS) if engine_name.startswith(WEEK_PREFIX) else 1
+        complete = result.ok and not result.violations and len(result.schedule) >= request.num_routes * days
+        entry = CacheEntry(
+            fingerprint=request_fingerprint(request, engine_name),
+            engine_name=engine_name,
+            settings=request_settings(request),
+            type_a_drivers=sorted(request.type_a_drivers),
+            type_b_drivers=sorted(request.type_b_drivers),
+            num_routes=request.num_routes,
+            schedule=list(result.schedule),
+            title=result.title,
+            fitness=result.fitness,
+            violations=result.violations,
+            complete=complete
+        )
+        self.forget(entry.fingerprint)
+        self.remember(entry)
+        self.touch(entry)
+        if self.directory is not None:
+            self.store_entry(entry)
+
+    def nearest(self, request):
+        best = None
+        best_distance = None
+        candidates = [(entry.fingerprint, entry) for entry in self.entries.values()]
+        candidates += [(fingerprint, None) for fingerprint in self.disk_index if fingerprint not in self.entries]
+        for fingerprint, entry in candidates:
+            if entry is None:
+                meta = self.disk_index[fingerprint]
+                if meta['engine_name'].startswith(WEEK_PREFIX):
+                    continue
+                entry = CacheEntry(fingerprint, meta['engine_name'], meta['settings'], meta['type_a_drivers'], meta['type_b_drivers'], meta['num_routes'])
+            if entry.engine_name.startswith(WEEK_PREFIX):
+                continue
+            distance = entry.distance(request)
+            if distance is not None and (best_distance is None or distance < best_distance):
+                best, best_distance = entry, distance
+        if best is None:
+            return None
+        if not best.schedule:
+            best = self.load_entry(best.fingerprint)
+            if best is None:
+                return None
+            self.remember(best)
+        return list(best.schedule)
+
+    def remember(self, entry):
+        self.entries[entry.fingerprint] = entry
+        self.trips += len(entry.schedule)
+        while len(self.entries) > self.max_entries or (self.trips > self.max_trips and len(self.entries) > 1):
+            fingerprint, evicted = self.entries.popitem(last=False)
+            self.trips -= len(evicted.schedule)
+
+    def forget(self, fingerprint):
+        entry = self.entries.pop(fingerprint, None)
+        if entry is not None:
+            self.trips -= len(entry.schedule)
+
+    def touch(self, entry):
+        entry.used = time.time()
+        if entry.fingerprint in self.disk_index:
+            self.disk_index[entry.fingerprint]['used'] = entry.used
+
+    def clear(self):
+        self.entries.clear()
+        self.trips = 0
+        if self.directory is not None:
+            for fingerprint in list(self.disk_index):
+                self.remove_file(fingerprint)
+            self.disk_index = {}
+            self.write_index()
+
+    def entry_path(self, fingerprint):
+        return os.path.join(self.directory, f"{fingerprint}.json")
+
+    def read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding='utf-8') as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def write_json(self, path, data):
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding='utf-8') as output:
+            json.dump(data, output, ensure_ascii=False)
+        os.replace(temporary_path, path)
+
+    def write_index(self):
+        self.write_json(os.path.join(self.directory, INDEX_FILE), self.disk_index)
+
+    def remove_file(self, fingerprint):
+        try:
+            os.remove(self.entry_path(fingerprint))
+        except OSError:
+            pass
+
+    def load_entry(self, fingerprint):
+        meta = self.disk_index.get(fingerprint)
+        try:
+            with open(self.entry_path(fingerprint), encoding='utf-8') as entry_file:
+                data = json.load(entry_file)
+        except (OSError, ValueError):
+            self.disk_index.pop(fingerprint, None)
+            return None
+        return CacheEntry(
+            fingerprint=fingerprint,
+            engine_name=meta['engine_name'],
+            settings=meta['settings'],
+            type_a_drivers=meta['type_a_drivers'],
+            type_b_drivers=meta['type_b_drivers'],
+            num_routes=meta['num_routes'],
+            schedule=[trip_from_dict(trip) for trip in data['schedule']],
+            title=data['title'],
+            fitness=data['fitness'],
+            violations=data['violations'],
+            complete=meta.get('complete', False),
+            used=meta.get('used', 0)
+        )
+
+    def store_entry(self, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.write_json(self.entry_path(entry.fingerprint), {
+                'schedule': [trip.as_dict() for trip in entry.schedule],
+                'title': entry.title,
+                'fitness': entry.fitness,
+                'violations': entry.violations
+            })
+            self.disk_index[entry.fingerprint] = entry.meta()
+            while len(self.disk_index) > self.max_disk_entries:
+                oldest = min(self.disk_index, key=lambda fingerprint: self.disk_index[fingerprint].get('used', 0))
+                del self.disk_index[oldest]
+                self.remove_file(oldest)
+            self.write_index()
+        except OSError:
+            pass
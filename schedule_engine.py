@@ -0,0 +1,442 @@
+import random
+import time
+from dataclasses import dataclass, field
+from fitness import ScheduleEvaluator
+from timeline import DriverTimeline, SERVICE_END, TripArray, TripCodes, make_trip
+
+DAYS = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
+WEEKEND_DAYS = ('Суббота', 'Воскресенье')
+ROUTE_OPTIONS = ['до конечной и обратно', 'до конечной']
+MIN_POPULATION = 4
+
+
+def is_weekend(selected_day):
+    return selected_day in WEEKEND_DAYS
+
+
+@dataclass
+class ScheduleRequest:
+    type_a_drivers: list
+    type_b_drivers: list
+    num_routes: int
+    travel_duration_minutes: int = 60
+    selected_day: str = "Понедельник"
+    shift_duration_a: int = 8
+    shift_duration_b: int = 12
+    break_time: int = 10
+    min_break_time: int = 30
+    route_options: list = field(default_factory=lambda: list(ROUTE_OPTIONS))
+
+    @property
+    def all_drivers(self):
+        return self.type_a_drivers + self.type_b_drivers
+
+    def is_weekend(self):
+        return is_weekend(self.selected_day)
+
+    def eligible_drivers(self, driver_list=None):
+        if driver_list is None:
+            driver_list = self.all_drivers
+        if not self.is_weekend():
+            return list(driver_list)
+        type_a = set(self.type_a_drivers)
+        return [driver for driver in driver_list if driver not in type_a]
+
+    def shift_limits(self, driver_list):
+        type_a = set(self.type_a_drivers)
+        limits = {}
+        for driver in driver_list:
+            shift_duration = self.shift_duration_a if driver in type_a else self.shift_duration_b
+            limits[driver] = shift_duration * 60
+        return limits
+
+    def route_time(self, route_type):
+        return self.travel_duration_minutes * 2 if 'обратно' in route_type else self.travel_duration_minutes
+
+
+@dataclass
+class ScheduleResult:
+    schedule: list = field(default_factory=list)
+    title: str = ""
+    failure: str = None
+    fitness: float = 0
+    violations: int = 0
+    cancelled: bool = False
+    stats: object = None
+
+    @property
+    def ok(self):
+        return self.failure is None
+
+
+class ScheduleEngine:
+    def __init__(self, request, rng=None, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.rng = rng if rng is not None else random.Random()
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.stats = stats
+        self.codes = None
+        if stats is not None:
+            self.can_assign_route = self.counted_can_assign_route
+            self.find_free_periods = self.counted_find_free_periods
+
+    def report_progress(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
+
+    def is_cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def calculate_additional_driver_needs(self, num_routes, driver_list, shift_duration):
+        max_routes_per_driver = int(shift_duration * 60 / self.request.travel_duration_minutes)
+        required_drivers = (num_routes + max_routes_per_driver - 1) // max_routes_per_driver
+        if len(driver_list) >= required_drivers:
+            return 0
+        else:
+            return required_drivers - len(driver_list)
+
+    def find_free_periods(self, driver_timelines, route_time, break_time):
+        free_slots = []
+        for timeline in driver_timelines.values():
+            free_slots.extend(timeline.free_periods(route_time + break_time))
+        return free_slots
+
+    def can_assign_route(self, candidate_start, route_time, timeline, shift_limit, min_break_time):
+        candidate_end = candidate_start + route_time
+        if candidate_end > SERVICE_END:
+            return False
+        if timeline.worked_minutes + route_time > shift_limit:
+            return False
+        return timeline.fits(candidate_start, candidate_end, min_break_time)
+
+    def counted_can_assign_route(self, candidate_start, route_time, timeline, shift_limit, min_break_time):
+        stats = self.stats
+        stats.count('can_assign_route.calls')
+        candidate_end = candidate_start + route_time
+        if candidate_end > SERVICE_END:
+            stats.count('reject.end_of_day')
+            return False
+        if timeline.worked_minutes + route_time > shift_limit:
+            stats.count('reject.shift_hours')
+            return False
+        if timeline.overlaps(candidate_start, candidate_end):
+            stats.count('reject.overlap')
+            return False
+        if not timeline.fits(candidate_start, candidate_end, min_break_time):
+            stats.count('reject.min_break')
+            return False
+        stats.count('can_assign_route.accepted')
+        return True
+
+    def counted_find_free_periods(self, driver_timelines, route_time, break_time):
+        self.stats.count('find_free_periods.calls')
+        return ScheduleEngine.find_free_periods(self, driver_timelines, route_time, break_time)
+
+    def note_exclusions(self, driver_list, eligible_drivers):
+        if self.stats is not None and len(driver_list) != len(eligible_drivers):
+            self.stats.count('excluded.weekend_type_a', len(driver_list) - len(eligible_drivers))
+
+    def record_generation(self, started):
+        if self.stats is not None:
+            self.stats.count('ga.generations')
+            self.stats.record_time('ga.generation', time.perf_counter() - started)
+
+    def trip_codes(self):
+        if self.codes is None:
+            request = self.request
+            self.codes = TripCodes(request.all_drivers, request.route_options + [f"{route_type} (доп рейс)" for route_type in request.route_options])
+        return self.codes
+
+    def pack_schedule(self, trips=()):
+        genome = TripArray(self.trip_codes())
+        for trip in trips:
+            genome.append(trip)
+        return genome
+
+    def place_trip(self, schedule, driver_timelines, driver, route_type, start, route_time):
+        timeline = driver_timelines[driver]
+        schedule.append(make_trip(driver, route_type, start, start + route_time, len(timeline) + 1))
+        timeline.add(start, start + route_time)
+
+    def adopt_schedule(self, seed_schedule, available_drivers, num_routes):
+        request = self.request
+        driver_timelines = {driver: DriverTimeline() for driver in available_drivers}
+        shift_limits = request.shift_limits(available_drivers)
+        schedule = []
+        for trip in sorted(seed_schedule, key=lambda trip: trip.start):
+            if len(schedule) >= num_routes:
+                break
+            driver = trip.driver
+            if driver not in driver_timelines:
+                continue
+            route_time = trip.end - trip.start
+            if self.can_assign_route(trip.start, route_time, driver_timelines[driver], shift_limits[driver], request.min_break_time):
+                self.place_trip(schedule, driver_timelines, driver, trip.route_type, trip.start, route_time)
+        if self.stats is not None:
+            self.stats.count('warm_start.kept', len(schedule))
+            self.stats.count('warm_start.dropped', min(len(seed_schedule), num_routes) - len(schedule))
+        return schedule, driver_timelines, shift_limits
+
+    def warm_start_individual(self, seed_schedule, driver_list, num_routes):
+        request = self.request
+        available_drivers = request.eligible_drivers(driver_list)
+        schedule, driver_timelines, shift_limits = self.adopt_schedule(seed_schedule, available_drivers, num_routes)
+        route_time = request.travel_duration_minutes
+        while len(schedule) < num_routes:
+            slot = self.allocate_driver_to_route(route_time, request.break_time, request.min_break_time, available_drivers, driver_timelines, shift_limits)
+            if slot is None:
+                break
+            driver, slot_start = slot
+            self.place_trip(schedule, driver_timelines, driver, self.rng.choice(request.route_options), slot_start, route_time)
+        return self.make_individual(self.pack_schedule(schedule))
+
+    def allocate_driver_to_route(self, route_time, break_time, min_break_time, driver_list, driver_timelines, shift_limits):
+        stats = self.stats
+        if stats is not None:
+            stats.count('allocate.calls')
+        free_slots = self.find_free_periods(driver_timelines, route_time, break_time)
+        if not free_slots:
+            if stats is not None:
+                stats.count('allocate.failures')
+            return None
+        candidates = list(driver_list)
+        for _ in range(50):
+            if stats is not None:
+                stats.count('allocate.attempts')
+            slot_start, slot_end = self.rng.choice(free_slots)
+            max_start = slot_end - slot_start - route_time
+            if max_start < 0:
+                continue
+            candidate_start = slot_start + self.rng.randint(0, max_start)
+            self.rng.shuffle(candidates)
+            for driver in candidates:
+                if self.can_assign_route(candidate_start, route_time, driver_timelines[driver], shift_limits[driver], min_break_time):
+                    return (driver, candidate_start)
+        if stats is not None:
+            stats.count('allocate.failures')
+        return None
+
+    def check_direct_inputs(self):
+        request = self.request
+        if not request.type_a_drivers and not request.type_b_drivers:
+            return "Нет водителей."
+        if request.is_weekend() and not request.type_b_drivers:
+            return "Выходной: Тип A не работает, а типа B нет."
+        if request.is_weekend() and not request.type_a_drivers:
+            additional_b = self.calculate_additional_driver_needs(request.num_routes, request.type_b_drivers, request.shift_duration_b)
+            if additional_b > 0:
+                return f"Недостаточно водителей B на выходной. Нужно {additional_b}."
+        return None
+
+    def check_genetic_inputs(self):
+        request = self.request
+        shift_duration = max(request.shift_duration_a, request.shift_duration_b)
+        additional_needed = self.calculate_additional_driver_needs(request.num_routes, request.all_drivers, shift_duration)
+        if additional_needed > 0:
+            return f"Недостаточно водителей.\nДобавьте минимум {additional_needed} водителей или уменьшите число рейсов."
+        return self.check_direct_inputs()
+
+    def direct_driver_pool(self):
+        request = self.request
+        failure = self.check_direct_inputs()
+        if failure:
+            return None, failure
+        if request.is_weekend() and not request.type_a_drivers:
+            driver_list = request.type_b_drivers
+            shift_duration = request.shift_duration_b
+        else:
+            driver_list = request.all_drivers
+            shift_duration = max(request.shift_duration_a, request.shift_duration_b)
+        additional_needed = self.calculate_additional_driver_needs(request.num_routes, driver_list, shift_duration)
+        if additional_needed > 0:
+            return None, f"Нехватка сотрудников.\nНужно добавить ещё {additional_needed} водителей или уменьшить число рейсов."
+        return driver_list, None
+
+    def build_optimized_timetable(self, warm_start=None):
+        request = self.request
+        driver_list, failure = self.direct_driver_pool()
+        if failure:
+            return ScheduleResult(failure=failure)
+        break_time = request.break_time
+        min_break_time = request.min_break_time
+        eligible_drivers = request.eligible_drivers(driver_list)
+        self.note_exclusions(driver_list, eligible_drivers)
+        if warm_start:
+            schedule, driver_timelines, shift_limits = self.adopt_schedule(warm_start, eligible_drivers, request.num_routes)
+            chain_ends = [trip.end for trip in schedule if not trip.route_type.endswith("(доп рейс)")]
+            current_time = max(chain_ends) + break_time + min_break_time if chain_ends else 0
+        else:
+            driver_timelines = {d: DriverTimeline() for d in eligible_drivers}
+            shift_limits = request.shift_limits(eligible_drivers)
+            schedule = []
+            current_time = 0
+        for _ in range(request.num_routes - len(schedule)):
+            if self.is_cancelled():
+                return ScheduleResult(schedule=schedule, title="Формирование отменено. Частичное расписание:", fitness=self.assess_schedule_quality(schedule), cancelled=True)
+            route_type = self.rng.choice(request.route_options)
+            actual_time = request.route_time(route_type)
+            candidate_end = current_time + actual_time
+            placed = False
+            if candidate_end <= SERVICE_END:
+                copy_drivers = list(eligible_drivers)
+                self.rng.shuffle(copy_drivers)
+                for driver in copy_drivers:
+                    if self.can_assign_route(current_time, actual_time, driver_timelines[driver], shift_limits[driver], min_break_time):
+                        self.place_trip(schedule, driver_timelines, driver, route_type, current_time, actual_time)
+                        placed = True
+                        current_time = candidate_end + break_time + min_break_time
+                        break
+            if not placed:
+                result = self.allocate_driver_to_route(actual_time, break_time, min_break_time, eligible_drivers, driver_timelines, shift_limits)
+                if result is None:
+                    message = "Расписание не утверждено.\nНужно добавить сотрудников или уменьшить число рейсов."
+                    return ScheduleResult(schedule=schedule, failure=message, fitness=self.assess_schedule_quality(schedule))
+                driver, slot_start = result
+                self.place_trip(schedule, driver_timelines, driver, f"{route_type} (доп рейс)", slot_start, actual_time)
+            self.report_progress(len(schedule), request.num_routes)
+        title = "Итоговое расписание:" if schedule else "Расписание не сформировано."
+        return ScheduleResult(schedule=schedule, title=title, fitness=self.assess_schedule_quality(schedule))
+
+    def generate_genetic_schedule_attempt(self, driver_list, num_routes):
+        request = self.request
+        available_drivers = request.eligible_drivers(driver_list)
+        self.note_exclusions(driver_list, available_drivers)
+        self.rng.shuffle(available_drivers)
+        driver_timelines = {driver: DriverTimeline() for driver in available_drivers}
+        shift_limits = request.shift_limits(available_drivers)
+        route_time = request.travel_duration_minutes
+        schedule = self.pack_schedule()
+        start_time = 0
+        for _ in range(num_routes):
+            placed = False
+            candidate_end_time = start_time + route_time
+            route_type = self.rng.choice(request.route_options)
+            if candidate_end_time > SERVICE_END:
+                route_type = f"{route_type} (доп рейс)"
+            for driver in available_drivers:
+                if self.can_assign_route(start_time, route_time, driver_timelines[driver], shift_limits[driver], request.min_break_time):
+                    self.place_trip(schedule, driver_timelines, driver, route_type, start_time, route_time)
+                    placed = True
+                    break
+            if not placed:
+                break
+            start_time = candidate_end_time + request.break_time
+            if start_time >= SERVICE_END:
+                start_time = 0
+        return schedule, len(schedule)
+
+    def assess_schedule_quality(self, schedule):
+        return ScheduleEvaluator(self.request, schedule).score()
+
+    def make_individual(self, schedule, evaluator=None):
+        if evaluator is None:
+            evaluator = ScheduleEvaluator(self.request)
+            for driver_id, start, end in schedule.intervals():
+                evaluator.add_interval(driver_id, start, end)
+        return {
+            'schedule': schedule,
+            'fitness': evaluator.score(),
+            'complete': evaluator.is_complete(),
+            'violations': evaluator.violation_count(),
+            'evaluator': evaluator
+        }
+
+    def execute_crossover(self, parent1, parent2):
+        if not parent1 or not parent2:
+            return parent1, parent2
+        crossover_point = len(parent1) // 2
+        child1 = parent1[:crossover_point] + parent2[crossover_point:]
+        child2 = parent2[:crossover_point] + parent1[crossover_point:]
+        return child1, child2
+
+    def crossover_individuals(self, parent1, parent2):
+        schedule1 = parent1['schedule']
+        schedule2 = parent2['schedule']
+        if not schedule1 or not schedule2:
+            return parent1, parent2
+        child1_schedule, child2_schedule = self.execute_crossover(schedule1, schedule2)
+        evaluator1 = parent1['evaluator'].copy()
+        evaluator2 = parent2['evaluator'].copy()
+        for index in range(len(schedule1) // 2, max(len(schedule1), len(schedule2))):
+            interval1 = schedule1.interval(index)
+            interval2 = schedule2.interval(index)
+            if interval1 != interval2:
+                evaluator1.replace_interval(interval1, interval2)
+                evaluator2.replace_interval(interval2, interval1)
+        return self.make_individual(child1_schedule, evaluator1), self.make_individual(child2_schedule, evaluator2)
+
+    def mutate_interval(self, interval, driver_list):
+        driver_id, start, end = interval
+        driver_id = self.trip_codes().driver_id(self.rng.choice(driver_list))
+        if self.rng.random() < 0.5:
+            shifted = max(0, start + self.rng.randint(-15, 15))
+            return driver_id, shifted, shifted + end - start
+        return driver_id, start, end
+
+    def mutate_individual(self, individual, driver_list):
+        schedule = individual['schedule']
+        if not schedule:
+            return individual
+        mutation_point = self.rng.randint(0, len(schedule) - 1)
+        interval = schedule.interval(mutation_point)
+        mutated = self.mutate_interval(interval, driver_list)
+        evaluator = individual['evaluator'].copy()
+        evaluator.replace_interval(interval, mutated)
+        return self.make_individual(schedule.replaced(mutation_point, *mutated), evaluator)
+
+    def execute_genetic_algorithm(self, generations=50, population_size=20, mutation_rate=0.1, warm_start=None):
+        failure = self.check_genetic_inputs()
+        if failure:
+            return ScheduleResult(failure=failure)
+        driver_list = self.request.all_drivers
+        num_routes = self.request.num_routes
+        population = []
+        started = time.perf_counter()
+        if warm_start:
+            population.append(self.warm_start_individual(warm_start, driver_list, num_routes))
+        while len(population) < population_size and not (population and population[0]['complete']):
+            if population and self.is_cancelled():
+                break
+            schedule, score = self.generate_genetic_schedule_attempt(driver_list, num_routes)
+            population.append(self.make_individual(schedule))
+        if self.stats is not None:
+            self.stats.record_time('ga.population', time.perf_counter() - started)
+        best = None
+        cancelled = False
+        for generation in range(generations):
+            started = time.perf_counter()
+            population = sorted(population, key=lambda x: x['fitness'], reverse=True)
+            current_best = population[0]
+            if best is None or current_best['fitness'] > best['fitness']:
+                best = current_best
+            self.report_progress(generation + 1, generations)
+            if best['complete']:
+                break
+            if self.is_cancelled():
+                cancelled = True
+                break
+            parents = population[:population_size // 2]
+            new_population = parents.copy()
+            while len(new_population) < population_size:
+                parent1, parent2 = self.rng.sample(parents, 2)
+                new_population.extend(self.crossover_individuals(parent1, parent2))
+            for index, individual in enumerate(new_population):
+                if self.rng.random() < mutation_rate:
+                    new_population[index] = self.mutate_individual(individual, driver_list)
+            population = new_population[:population_size]
+            self.record_generation(started)
+        return self.genetic_result(best, cancelled)
+
+    def genetic_result(self, best, cancelled=False):
+        if cancelled:
+            title_text = "Генетический алгоритм остановлен. Лучшее найденное расписание"
+        elif best is not None and best['complete']:
+            title_text = "Генетический алгоритм завершен. Лучшее расписание"
+        else:
+            title_text = "Генетический алгоритм завершен. Лучшее найденное расписание"
+        if best is None or not best['schedule']:
+            return ScheduleResult(title=title_text, cancelled=cancelled)
+        schedule = list(best['schedule'])
+        details = f"{len(schedule)} рейсов, нарушений: {best['violations']}" if best['violations'] else f"{len(schedule)} рейсов"
+        return ScheduleResult(schedule=schedule, title=f"{title_text} ({details}):", fitness=best['fitness'], violations=best['violations'], cancelled=cancelled)
@@ -0,0 +1,175 @@
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from fitness import ScheduleEvaluator
+from schedule_engine import ScheduleEngine, ScheduleResult
+from timeline import DriverTimeline, make_trip
+
+SHIFT_STEP = 5
+MAX_SHIFT = 120
+
+
+@dataclass
+class ScheduleDelta:
+    added_drivers: list = field(default_factory=list)
+    removed_drivers: list = field(default_factory=list)
+    added_trips: list = field(default_factory=list)
+    removed_trips: list = field(default_factory=list)
+    delayed_trips: list = field(default_factory=list)
+
+
+class ScheduleRepair:
+    def __init__(self, request, schedule, stats=None):
+        self.request = replace(request, type_a_drivers=list(request.type_a_drivers), type_b_drivers=list(request.type_b_drivers), num_routes=len(schedule))
+        self.engine = ScheduleEngine(self.request, stats=stats)
+        self.stats = stats
+        eligible_drivers = self.request.eligible_drivers()
+        self.shift_limits = self.request.shift_limits(eligible_drivers)
+        self.timelines = {driver: DriverTimeline() for driver in eligible_drivers}
+        self.trips = dict(enumerate(schedule))
+        self.next_id = len(schedule)
+        self.driver_trips = defaultdict(set)
+        for trip_id, trip in self.trips.items():
+            self.driver_trips[trip.driver].add(trip_id)
+            timeline = self.timelines.get(trip.driver)
+            if timeline is not None:
+                timeline.add(trip.start, trip.end)
+        self.evaluator = ScheduleEvaluator(self.request, schedule)
+        self.unassigned = {}
+        self.changed = set()
+
+    def apply(self, delta):
+        for name, category in delta.added_drivers:
+            self.add_driver(name, category)
+        for trip_id in delta.removed_trips:
+            self.remove_trip(trip_id)
+        for trip_id, minutes in delta.delayed_trips:
+            self.delay_trip(trip_id, minutes)
+        for name in delta.removed_drivers:
+            self.remove_driver(name)
+        for route_type, start in delta.added_trips:
+            self.add_trip(route_type, start)
+        return self.result()
+
+    def add_driver(self, name, category):
+        if name in self.shift_limits or name in self.request.all_drivers:
+            return
+        if category == "A":
+            self.request.type_a_drivers.append(name)
+        else:
+            self.request.type_b_drivers.append(name)
+        shift_limit = self.request.shift_limits([name])[name]
+        eligible = bool(self.request.eligible_drivers([name]))
+        self.evaluator.add_driver(name, shift_limit, banned=not eligible)
+        if eligible:
+            self.shift_limits[name] = shift_limit
+            self.timelines[name] = DriverTimeline()
+            for trip_id, (route_type, start, duration) in list(self.unassigned.items()):
+                self.assign(trip_id, route_type, start, duration)
+
+    def remove_driver(self, name):
+        trip_ids = sorted(self.driver_trips.pop(name, ()), key=lambda trip_id: self.trips[trip_id].start)
+        pending = [self.unassign(trip_id) for trip_id in trip_ids]
+        for driver_list in (self.request.type_a_drivers, self.request.type_b_drivers):
+            if name in driver_list:
+                driver_list.remove(name)
+        self.shift_limits.pop(name, None)
+        self.timelines.pop(name, None)
+        self.evaluator.remove_driver(name)
+        for trip_id, (route_type, start, duration) in zip(trip_ids, pending):
+            self.assign(trip_id, route_type, start, duration)
+
+    def add_trip(self, route_type, start):
+        trip_id = self.next_id
+        self.next_id += 1
+        self.set_demand(1)
+        self.assign(trip_id, route_type, start, self.request.route_time(route_type))
+        return trip_id
+
+    def remove_trip(self, trip_id):
+        if trip_id not in self.trips and trip_id not in self.unassigned:
+            return False
+        self.set_demand(-1)
+        if self.unassigned.pop(trip_id, None) is None:
+            driver = self.trips[trip_id].driver
+            self.driver_trips[driver].discard(trip_id)
+            self.unassign(trip_id)
+            self.renumber(driver)
+        self.changed.discard(trip_id)
+        return True
+
+    def delay_trip(self, trip_id, minutes):
+        if trip_id in self.unassigned:
+            route_type, start, duration = self.unassigned.pop(trip_id)
+            self.assign(trip_id, route_type, start + minutes, duration)
+            return
+        if trip_id not in self.trips:
+            return
+        driver = self.trips[trip_id].driver
+        self.driver_trips[driver].discard(trip_id)
+        route_type, start, duration = self.unassign(trip_id)
+        self.renumber(driver)
+        self.assign(trip_id, route_type, start + minutes, duration, preferred=driver)
+
+    def set_demand(self, change):
+        self.request.num_routes += change
+        self.evaluator.num_routes += change
+
+    def unassign(self, trip_id):
+        trip = self.trips.pop(trip_id)
+        timeline = self.timelines.get(trip.driver)
+        if timeline is not None:
+            timeline.remove(trip.start, trip.end)
+        self.evaluator.remove_trip(trip)
+        return trip.route_type, trip.start, trip.end - trip.start
+
+    def candidates(self, preferred):
+        drivers = sorted(self.timelines, key=lambda driver: (self.timelines[driver].worked_minutes, driver))
+        if preferred in self.timelines:
+            drivers.remove(preferred)
+            drivers.insert(0, preferred)
+        return drivers
+
+    def assign(self, trip_id, route_type, start, duration, preferred=None):
+        drivers = self.candidates(preferred)
+        min_break_time = self.request.min_break_time
+        for shift in range(0, MAX_SHIFT + 1, SHIFT_STEP):
+            for driver in drivers:
+                if self.engine.can_assign_route(start + shift, duration, self.timelines[driver], self.shift_limits[driver], min_break_time):
+                    self.place(trip_id, driver, route_type, start + shift, duration)
+                    return True
+        self.unassigned[trip_id] = (route_type, start, duration)
+        if self.stats is not None:
+            self.stats.count('repair.unassigned')
+        return False
+
+    def place(self, trip_id, driver, route_type, start, duration):
+        trip = make_trip(driver, route_type, start, start + duration, 0)
+        self.timelines[driver].add(start, start + duration)
+        self.evaluator.add_trip(trip)
+        self.trips[trip_id] = trip
+        self.driver_trips[driver].add(trip_id)
+        self.unassigned.pop(trip_id, None)
+        self.changed.add(trip_id)
+        if self.stats is not None:
+            self.stats.count('repair.reassigned')
+        self.renumber(driver)
+
+    def renumber(self, driver):
+        trip_ids = sorted(self.driver_trips[driver], key=lambda trip_id: self.trips[trip_id].start)
+        for route_number, trip_id in enumerate(trip_ids, start=1):
+            if self.trips[trip_id].route_number != route_number:
+                self.trips[trip_id] = self.trips[trip_id].replace(route_number=route_number)
+
+    def result(self):
+        schedule = [self.trips[trip_id] for trip_id in sorted(self.trips)]
+        fitness = self.evaluator.score()
+        violations = self.evaluator.violation_count()
+        if self.unassigned:
+            message = f"Не удалось переназначить рейсов: {len(self.unassigned)}.\nНужно добавить водителей или убрать рейсы."
+            return ScheduleResult(schedule=schedule, failure=message, fitness=fitness, violations=violations)
+        title = f"Расписание исправлено (изменено рейсов: {len(self.changed)}):"
+        return ScheduleResult(schedule=schedule, title=title, fitness=fitness, violations=violations)
+
+
+def repair_schedule(request, schedule, delta, stats=None):
+    return ScheduleRepair(request, schedule, stats=stats).apply(delta)
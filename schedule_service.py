@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from capacity import estimate_for_engine
+from dispatcher import HeapDispatcher
+from island_ga import IslandGeneticAlgorithm
+from local_search import LocalSearchOptimizer
+from roster_io import collect_roster, json_roster_rows
+from schedule_cache import request_fingerprint
+from schedule_engine import DAYS, MIN_POPULATION, ScheduleEngine, ScheduleRequest
+from schedule_worker import ScheduleJob
+from timeline import minutes_to_clock
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE = 32
+DEFAULT_TIMEOUT = 120
+MAX_TIMEOUT = 3600
+MAX_BODY = 4 * 2 ** 20
+KEEP_FINISHED = 256
+ENGINES = ('fast', 'direct', 'genetic', 'island', 'local')
+ENGINE_OPTIONS = {
+    'genetic': {'generations': 50, 'population': 20, 'mutation_rate': 0.1},
+    'island': {'generations': 50, 'population': 20, 'mutation_rate': 0.1, 'islands': 4},
+    'local': {'time_budget': 2.0}
+}
+OPTION_MINIMUMS = {'population': MIN_POPULATION}
+REQUEST_FIELDS = {'travel_duration_minutes': 1, 'shift_duration_a': 1, 'shift_duration_b': 1, 'break_time': 0, 'min_break_time': 0}
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class JobError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def read_number(payload, name, default, kind=int, minimum=1):
+    value = payload.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+        raise JobError(400, f"Поле '{name}' должно быть числом не меньше {minimum}.")
+    return kind(value)
+
+
+def read_names(payload, name):
+    names = payload.get(name, [])
+    if not isinstance(names, list) or not all(isinstance(item, str) for item in names):
+        raise JobError(400, f"Поле '{name}' должно быть списком строк.")
+    return names
+
+
+def read_roster(payload):
+    roster = payload['roster']
+    if isinstance(roster, dict):
+        valid = all(isinstance(names, list) for names in roster.values())
+    else:
+        valid = isinstance(roster, list) and all(isinstance(item, (str, list, dict)) for item in roster)
+    if not valid:
+        raise JobError(400, "Поле 'roster' должно быть списком водителей или объектом {категория: [имена]}.")
+    return roster
+
+
+def parse_job(payload):
+    if not isinstance(payload, dict):
+        raise JobError(400, "Ожидается JSON-объект задания.")
+    type_a_drivers = list(read_names(payload, 'type_a_drivers'))
+    type_b_drivers = list(read_names(payload, 'type_b_drivers'))
+    if 'roster' in payload:
+        roster = collect_roster(json_roster_rows(read_roster(payload)), type_a_drivers, type_b_drivers)
+        type_a_drivers += roster.type_a_drivers
+        type_b_drivers += roster.type_b_drivers
+    selected_day = payload.get('day', DAYS[0])
+    if selected_day not in DAYS:
+        raise JobError(400, f"Неизвестный день '{selected_day}'.")
+    engine_name = payload.get('engine', 'direct')
+    if engine_name not in ENGINES:
+        raise JobError(400, f"Неизвестный движок '{engine_name}', доступны: {', '.join(ENGINES)}.")
+    settings = {field: read_number(payload, field, None, minimum=minimum) for field, minimum in REQUEST_FIELDS.items() if field in payload}
+    request = ScheduleRequest(type_a_drivers, type_b_drivers, read_number(payload, 'num_routes', None), selected_day=selected_day, **settings)
+    options = {name: read_number(payload, name, default, type(default), OPTION_MINIMUMS.get(name, 0.01 if isinstance(default, float) else 1)) for name, default in ENGINE_OPTIONS.get(engine_name, {}).items()}
+    timeout = min(MAX_TIMEOUT, read_number(payload, 'timeout', DEFAULT_TIMEOUT, float, 0.1))
+    return request, engine_name, options, timeout
+
+
+def run_engine(request, engine_name, options, progress, cancel_event):
+    if engine_name == 'fast':
+        return HeapDispatcher(request, progress=progress, cancel_event=cancel_event).run()
+    if engine_name == 'island':
+        island_ga = IslandGeneticAlgorithm(request, islands=options['islands'], island_size=options['population'], workers=1, progress=progress, cancel_event=cancel_event)
+        return island_ga.run(generations=options['generations'], mutation_rate=options['mutation_rate'])
+    if engine_name == 'local':
+        return LocalSearchOptimizer(request, options['time_budget'], progress=progress, cancel_event=cancel_event).run()
+    engine = ScheduleEngine(request, random.Random(), progress=progress, cancel_event=cancel_event)
+    if engine_name == 'genetic':
+        return engine.execute_genetic_algorithm(generations=options['generations'], population_size=options['population'], mutation_rate=options['mutation_rate'])
+    return engine.build_optimized_timetable()
+
+
+def trip_json(trip):
+    return {
+        'driver': trip.driver,
+        'route_type': trip.route_type,
+        'start': minutes_to_clock(trip.start),
+        'end': minutes_to_clock(trip.end),
+        'route_number': trip.route_number
+    }
+
+
+class ServiceJob:
+    def __init__(self, job_id, key, request, engine_name, options, timeout):
+        self.id = job_id
+        self.key = key
+        self.engine_name = engine_name
+        self.timeout = timeout
+        self.job = ScheduleJob(lambda progress, cancel_event: run_engine(request, engine_name, options, progress, cancel_event))
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.coalesced = 0
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def cancel(self):
+        if self.active:
+            self.job.cancel()
+            if self.status == 'queued':
+                self.finish('cancelled')
+
+    def finish(self, status):
+        self.status = status
+        self.finished = time.time()
+
+    def describe(self, with_result=True):
+        done, total = self.job.progress
+        info = {
+            'id': self.id,
+            'status': self.status,
+            'engine': self.engine_name,
+            'progress': {'done': done, 'total': total},
+            'coalesced': self.coalesced,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'timeout': self.timeout
+        }
+        if self.job.error is not None:
+            info['error'] = "Ошибка при формировании расписания."
+        result = self.job.result
+        if with_result and result is not None and not self.active:
+            info['result'] = {
+                'title': result.title,
+                'failure': result.failure,
+                'fitness': result.fitness,
+                'violations': result.violations,
+                'cancelled': result.cancelled,
+                'schedule': [trip_json(trip) for trip in result.schedule]
+            }
+        return info
+
+
+class ScheduleService:
+    def __init__(self, workers=DEFAULT_WORKERS, max_queue=DEFAULT_QUEUE, keep_finished=KEEP_FINISHED):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.keep_finished = keep_finished
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="schedule")
+        self.slots = asyncio.Semaphore(self.workers)
+        self.jobs = OrderedDict()
+        self.active_keys = {}
+        self.job_ids = itertools.count(1)
+
+    def pending_count(self):
+        return sum(1 for job in self.jobs.values() if job.active)
+
+    def submit(self, payload):
+        request, engine_name, options, timeout = parse_job(payload)
+        key = request_fingerprint(request, engine_name + json.dumps(options, sort_keys=True))
+        job = self.jobs.get(self.active_keys.get(key))
+        if job is not None and job.active:
+            job.coalesced += 1
+            return job, True
+        if self.pending_count() >= self.max_queue:
+            raise JobError(503, "Очередь заданий заполнена, повторите позже.")
+        estimate = estimate_for_engine(request, engine_name)
+        if not estimate.ok:
+            raise JobError(422, estimate.failure)
+        job = ServiceJob(str(next(self.job_ids)), key, request, engine_name, options, timeout)
+        self.jobs[job.id] = job
+        self.active_keys[key] = job.id
+        asyncio.get_running_loop().create_task(self.execute(job))
+        self.forget_finished()
+        return job, False
+
+    async def execute(self, job):
+        async with self.slots:
+            if job.active:
+                job.status = 'running'
+                job.started = time.time()
+                future = asyncio.get_running_loop().run_in_executor(self.pool, job.job.execute)
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), job.timeout)
+                except asyncio.TimeoutError:
+                    job.job.cancel()
+                    await future
+                    job.finish('timeout')
+                else:
+                    if job.job.error is not None:
+                        job.finish('failed')
+                    elif job.job.cancel_event.is_set():
+                        job.finish('cancelled')
+                    else:
+                        job.finish('done')
+        if self.active_keys.get(job.key) == job.id:
+            del self.active_keys[job.key]
+
+    def forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job_id]
+
+    def route(self, method, path, payload):
+        parts = [part for part in urlsplit(path).path.split('/') if part]
+        if parts == ['jobs'] and method == 'POST':
+            job, coalesced = self.submit(payload)
+            return (200 if coalesced else 202), job.describe(with_result=False)
+        if parts == ['jobs'] and method == 'GET':
+            return 200, {'jobs': [job.describe(with_result=False) for job in self.jobs.values()], 'workers': self.workers, 'pending': self.pending_count()}
+        if len(parts) == 2 and parts[0] == 'jobs':
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise JobError(404, f"Задание {parts[1]} не найдено.")
+            if method == 'GET':
+                return 200, job.describe()
+            if method == 'DELETE':
+                job.cancel()
+                return 200, job.describe(with_result=False)
+            raise JobError(405, "Метод не поддерживается.")
+        raise JobError(404, "Неизвестный адрес.")
+
+    async def handle(self, reader, writer):
+        try:
+            status, body = await self.respond(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception:
+            status, body = 500, {'error': "Внутренняя ошибка сервиса."}
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: application/json; charset=utf-8\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+        writer.write(head.encode('ascii') + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def respond(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            return 400, {'error': "Некорректный HTTP-запрос."}
+        method, path = request_line[0].upper(), request_line[1]
+        length = 0
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value.strip()) if value.strip().isdigit() else -1
+        if length < 0 or length > MAX_BODY:
+            return 413, {'error': "Слишком большое или некорректное тело запроса."}
+        payload = None
+        if length:
+            try:
+                payload = json.loads((await reader.readexactly(length)).decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                return 400, {'error': "Тело запроса должно быть JSON в UTF-8."}
+        try:
+            return self.route(method, path, payload)
+        except JobError as error:
+            return error.status, {'error': str(error)}
+
+    async def serve(self, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, HOST, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        for job in self.jobs.values():
+            job.cancel()
+        self.pool.shutdown(wait=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=f"Локальный HTTP/JSON сервис заданий расписания (только {HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="сколько заданий считается одновременно")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE, help="максимум заданий в очереди и в работе")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    async def serve():
+        service = ScheduleService(workers=args.workers, max_queue=args.queue)
+        print(f"Сервис расписаний: http://{HOST}:{args.port}/jobs, обработчиков: {service.workers}")
+        try:
+            await service.serve(args.port)
+        finally:
+            service.close()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
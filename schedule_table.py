@@ -0,0 +1,103 @@
+from schedule_engine import DAYS
+from timeline import DAY_COLUMN, SCHEDULE_COLUMNS, minutes_to_clock
+
+
+class ScheduleTable:
+    def __init__(self, schedule):
+        self.drivers = [trip.driver for trip in schedule]
+        self.route_types = [trip.route_type for trip in schedule]
+        self.starts = [trip.start for trip in schedule]
+        self.ends = [trip.end for trip in schedule]
+        self.route_numbers = [trip.route_number for trip in schedule]
+        self.columns = dict(zip(SCHEDULE_COLUMNS, (self.drivers, self.route_types, self.starts, self.ends, self.route_numbers)))
+        self.column_names = list(SCHEDULE_COLUMNS)
+        self.day_indices = None
+        if schedule and schedule[0].day is not None:
+            day_order = {day: index for index, day in enumerate(DAYS)}
+            self.day_indices = [day_order.get(trip.day, len(DAYS)) for trip in schedule]
+            self.day_names = [trip.day for trip in schedule]
+            self.columns[DAY_COLUMN] = self.day_indices
+            self.column_names.insert(0, DAY_COLUMN)
+        self.order = list(range(len(self.drivers)))
+        self.view = self.order
+        self.filters = {}
+        self.sort_column = None
+        self.sort_descending = False
+
+    def __len__(self):
+        return len(self.view)
+
+    def total_rows(self):
+        return len(self.order)
+
+    def row(self, position):
+        index = self.view[position]
+        row = (
+            self.drivers[index],
+            self.route_types[index],
+            minutes_to_clock(self.starts[index]),
+            minutes_to_clock(self.ends[index]),
+            self.route_numbers[index]
+        )
+        if self.day_indices is not None:
+            return (self.day_names[index],) + row
+        return row
+
+    def rows(self, first, count):
+        return [self.row(position) for position in range(first, min(first + count, len(self.view)))]
+
+    def driver_names(self):
+        return sorted(set(self.drivers))
+
+    def day_names_present(self):
+        if self.day_indices is None:
+            return []
+        present = set(self.day_names)
+        return [day for day in DAYS if day in present]
+
+    def route_type_names(self):
+        return sorted(set(self.route_types))
+
+    def sort(self, column, descending=None):
+        if descending is None:
+            descending = not self.sort_descending if column == self.sort_column else False
+        values = self.columns[column]
+        self.order.sort(key=values.__getitem__, reverse=descending)
+        self.sort_column = column
+        self.sort_descending = descending
+        self.refresh_view()
+
+    def apply_filter(self, driver=None, route_type=None, time_from=None, time_to=None, day=None):
+        self.filters = {'driver': driver, 'route_type': route_type, 'time_from': time_from, 'time_to': time_to, 'day': day}
+        self.refresh_view()
+
+    def clear_filter(self):
+        self.filters = {}
+        self.refresh_view()
+
+    def refresh_view(self):
+        driver = (self.filters.get('driver') or '').lower()
+        route_type = self.filters.get('route_type') or ''
+        time_from = self.filters.get('time_from')
+        time_to = self.filters.get('time_to')
+        day = self.filters.get('day') or ''
+        if not driver and not route_type and time_from is None and time_to is None and not day:
+            self.view = self.order
+            return
+        view = self.order
+        if day and self.day_indices is not None:
+            day_names = self.day_names
+            view = [index for index in view if day_names[index] == day]
+        if driver:
+            drivers = self.drivers
+            view = [index for index in view if driver in drivers[index].lower()]
+        if route_type:
+            route_types = self.route_types
+            view = [index for index in view if route_types[index] == route_type]
+        if time_from is not None:
+            starts = self.starts
+            view = [index for index in view if starts[index] >= time_from]
+        if time_to is not None:
+            starts = self.starts
+            view = [index for index in view if starts[index] <= time_to]
+        self.view = view
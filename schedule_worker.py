@@ -0,0 +1,33 @@
+import threading
+
+
+class ScheduleJob:
+    def __init__(self, run):
+        self.run = run
+        self.cancel_event = threading.Event()
+        self.finished = threading.Event()
+        self.progress = (0, 0)
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self.execute, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def execute(self):
+        try:
+            self.result = self.run(self.report_progress, self.cancel_event)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.finished.set()
+
+    def report_progress(self, done, total):
+        self.progress = (done, total)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_done(self):
+        return self.finished.is_set()
@@ -0,0 +1,151 @@
+import argparse
+import random
+import sys
+from capacity import estimate_for_engine, estimate_network, estimate_week
+from dispatcher import HeapDispatcher
+from instrumentation import RunStats
+from island_ga import IslandGeneticAlgorithm
+from local_search import LocalSearchOptimizer
+from network import NetworkScheduler
+from parallel_ga import ParallelGeneticAlgorithm
+from roster_io import CsvScheduleWriter, export_schedule, import_lines, import_roster
+from schedule_cache import WEEK_PREFIX, ScheduleCache
+from schedule_engine import DAYS, MIN_POPULATION, ScheduleEngine, ScheduleRequest
+from week_schedule import WEEK_ENGINES, WeekScheduler
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Составление расписания водителей без графического интерфейса.")
+    parser.add_argument("roster", help="CSV-файл со строками 'имя,категория' (A или B) или JSON-список водителей")
+    parser.add_argument("-n", "--routes", type=int, default=None, help="число маршрутов за день")
+    parser.add_argument("--lines", default=None, help="CSV или JSON с линиями сети: название, длительность, рейсов, интервал, первый рейс")
+    parser.add_argument("-d", "--duration", type=int, default=60, help="продолжительность маршрута в минутах")
+    parser.add_argument("--day", choices=DAYS, default="Понедельник")
+    parser.add_argument("--week", action='store_true', help="составить расписание сразу на все дни недели")
+    parser.add_argument("--engine", choices=["direct", "fast", "genetic", "island", "array", "local"], default="direct")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--population", type=int, default=20)
+    parser.add_argument("--mutation-rate", type=float, default=0.1)
+    parser.add_argument("--islands", type=int, default=4, help="число островов для --engine island")
+    parser.add_argument("--migration-interval", type=int, default=5)
+    parser.add_argument("--patience", type=int, default=3, help="сколько миграций подряд без улучшения до остановки")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="секунд на --engine local; лучший найденный вариант отдаётся по истечении")
+    parser.add_argument("--workers", type=int, default=0, help="число процессов для генетического алгоритма (0 - без пула)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--stats", default=None, help="записать счётчики и замеры времени в JSON или CSV")
+    parser.add_argument("--cache", default=None, help="каталог кэша расписаний: повтор отдаётся сразу, похожий запуск стартует с сохранённого")
+    parser.add_argument("-o", "--output", default="-", help="куда записать расписание: CSV или .scol (по умолчанию CSV в stdout)")
+    return parser
+
+
+def run_engine(engine, args, warm_start=None):
+    if args.lines:
+        return NetworkScheduler(engine.request, args.network_lines, stats=engine.stats).run()
+    if args.week:
+        week = WeekScheduler(engine.request, args.engine, workers=args.workers or None, seed=args.seed, stats=engine.stats)
+        if args.engine == "genetic":
+            return week.run(generations=args.generations, population_size=args.population, mutation_rate=args.mutation_rate)
+        return week.run()
+    if args.engine == "fast":
+        return HeapDispatcher(engine.request, stats=engine.stats).run()
+    if args.engine == "island":
+        island_ga = IslandGeneticAlgorithm(
+            engine.request,
+            islands=args.islands,
+            island_size=args.population,
+            migration_interval=args.migration_interval,
+            patience=args.patience,
+            workers=args.workers or None,
+            seed=args.seed,
+            stats=engine.stats
+        )
+        return island_ga.run(generations=args.generations, mutation_rate=args.mutation_rate, warm_start=warm_start)
+    if args.engine == "local":
+        optimizer = LocalSearchOptimizer(engine.request, args.time_budget, seed=args.seed, stats=engine.stats)
+        return optimizer.run(warm_start=warm_start)
+    if args.engine == "array":
+        from array_ga import ArrayGeneticAlgorithm
+        array_ga = ArrayGeneticAlgorithm(engine.request, seed=args.seed, stats=engine.stats)
+        return array_ga.run(generations=args.generations, population_size=args.population, mutation_rate=args.mutation_rate)
+    if args.engine == "genetic" and args.workers > 0:
+        parallel = ParallelGeneticAlgorithm(engine.request, workers=args.workers, seed=args.seed, stats=engine.stats)
+        return parallel.run(generations=args.generations, population_size=args.population, mutation_rate=args.mutation_rate)
+    if args.engine == "genetic":
+        return engine.execute_genetic_algorithm(generations=args.generations, population_size=args.population, mutation_rate=args.mutation_rate, warm_start=warm_start)
+    return engine.build_optimized_timetable(warm_start=warm_start)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.population < MIN_POPULATION:
+        parser.error(f"--population должен быть не меньше {MIN_POPULATION}")
+    if args.week and args.engine not in WEEK_ENGINES:
+        parser.error(f"--week поддерживает движки: {', '.join(WEEK_ENGINES)}")
+    if args.lines:
+        if args.week or args.engine not in ("direct", "fast"):
+            parser.error("--lines работает только с движками direct и fast на один день")
+        args.network_lines, rejected = import_lines(args.lines)
+        for position, reason in rejected:
+            print(f"{args.lines}:{position}: {reason}", file=sys.stderr)
+        if not args.network_lines:
+            parser.error(f"{args.lines}: нет ни одной линии")
+    elif args.routes is None:
+        parser.error("нужно указать -n/--routes или --lines")
+    roster = import_roster(args.roster)
+    if roster.duplicates or roster.conflicts or roster.rejected:
+        print(f"{args.roster}: {roster.summary()}", file=sys.stderr)
+        for position, reason in roster.rejected:
+            print(f"{args.roster}:{position}: {reason}", file=sys.stderr)
+    request = ScheduleRequest(
+        type_a_drivers=roster.type_a_drivers,
+        type_b_drivers=roster.type_b_drivers,
+        num_routes=args.routes or 0,
+        travel_duration_minutes=args.duration,
+        selected_day=args.day
+    )
+    if args.lines:
+        estimate = estimate_network(request, args.network_lines)
+    elif args.week:
+        estimate = estimate_week(request, args.engine)
+    else:
+        estimate = estimate_for_engine(request, args.engine)
+    if not estimate.ok:
+        print(estimate.failure, file=sys.stderr)
+        return 1
+    stats = RunStats() if args.stats else None
+    engine = ScheduleEngine(request, random.Random(args.seed), stats=stats)
+    cache = ScheduleCache(directory=args.cache) if args.cache and not args.lines else None
+    cache_name = WEEK_PREFIX + args.engine if args.week else args.engine
+    if args.engine == "local":
+        cache_name = f"local:{args.time_budget}"
+    result = cache.get(request, cache_name) if cache is not None else None
+    if result is None:
+        warm_start = cache.nearest(request) if cache is not None else None
+        if stats is None:
+            result = run_engine(engine, args, warm_start)
+        else:
+            with stats.timer('run.total'):
+                result = run_engine(engine, args, warm_start)
+            stats.write(args.stats)
+        if cache is not None:
+            cache.put(request, cache_name, result)
+    elif stats is not None:
+        stats.count('cache.hits')
+        stats.write(args.stats)
+    if result.failure:
+        print(result.failure, file=sys.stderr)
+        return 1
+    if not result.schedule:
+        print("Не удалось сгенерировать расписание.", file=sys.stderr)
+        return 1
+    if args.output == "-":
+        CsvScheduleWriter(sys.stdout, with_day=args.week).write(result.schedule)
+    else:
+        export_schedule(args.output, result.schedule, with_day=args.week)
+    print(result.title, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+import itertools
+import random
+import unittest
+from capacity import estimate_for_engine
+from dispatcher import HeapDispatcher
+from fitness import ScheduleEvaluator
+from schedule_engine import ScheduleEngine, ScheduleRequest
+
+
+def solved(request, result):
+    return len(result.schedule) >= request.num_routes and ScheduleEvaluator(request, result.schedule).violation_count() == 0
+
+
+class PrecheckTest(unittest.TestCase):
+    def test_precheck_never_rejects_a_solved_instance(self):
+        grid = itertools.product(range(3), range(1, 3), (4, 8, 10, 14), (45, 60, 90))
+        for type_a_count, type_b_count, num_routes, travel_duration in grid:
+            request = ScheduleRequest([f"a{index}" for index in range(type_a_count)], [f"b{index}" for index in range(type_b_count)], num_routes, travel_duration_minutes=travel_duration)
+            runs = [('fast', HeapDispatcher(request).run())]
+            runs += [('direct', ScheduleEngine(request, random.Random(seed)).build_optimized_timetable()) for seed in range(20)]
+            for engine_name, result in runs:
+                if solved(request, result):
+                    with self.subTest(engine=engine_name, drivers=(type_a_count, type_b_count), routes=num_routes, travel=travel_duration):
+                        self.assertTrue(estimate_for_engine(request, engine_name).ok)
+
+    def test_random_route_types_use_the_shortest_trip(self):
+        request = ScheduleRequest([], ['b0'], 10, travel_duration_minutes=60)
+        self.assertTrue(estimate_for_engine(request, 'direct').ok)
+        self.assertTrue(estimate_for_engine(request, 'local').ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
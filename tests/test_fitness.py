@@ -0,0 +1,52 @@
+import random
+import unittest
+from fitness import ScheduleEvaluator
+from schedule_engine import ScheduleEngine, ScheduleRequest
+from timeline import make_trip
+
+
+def random_trip(rng, drivers):
+    start = rng.choice((0, 60, 90, 120, 1200))
+    return make_trip(rng.choice(drivers), "до конечной", start, start + rng.choice((30, 60, 120)), 1)
+
+
+class IncrementalEvaluationTest(unittest.TestCase):
+    def test_edits_match_full_evaluation(self):
+        rng = random.Random(5)
+        request = ScheduleRequest(['a', 'b'], ['c'], 6, selected_day="Суббота")
+        for _ in range(3000):
+            schedule = [random_trip(rng, request.all_drivers + ['x']) for _ in range(rng.randint(0, 6))]
+            evaluator = ScheduleEvaluator(request, schedule)
+            for _ in range(rng.randint(1, 8)):
+                if rng.random() < 0.3:
+                    evaluator = evaluator.copy()
+                index = rng.randrange(len(schedule) + 1)
+                trip = random_trip(rng, request.all_drivers)
+                if index == len(schedule):
+                    evaluator.add_trip(trip)
+                    schedule.append(trip)
+                elif rng.random() < 0.2:
+                    evaluator.remove_trip(schedule.pop(index))
+                else:
+                    evaluator.replace_trip(schedule[index], trip)
+                    schedule[index] = trip
+            fresh = ScheduleEvaluator(request, schedule)
+            self.assertAlmostEqual(evaluator.score(), fresh.score())
+            self.assertEqual(evaluator.violation_count(), fresh.violation_count())
+
+    def test_genetic_children_match_full_evaluation(self):
+        request = ScheduleRequest(['a', 'b', 'c'], ['d', 'e'], 40, selected_day="Суббота")
+        engine = ScheduleEngine(request, random.Random(7))
+        population = [engine.make_individual(engine.generate_genetic_schedule_attempt(request.all_drivers, request.num_routes)[0]) for _ in range(6)]
+        for _ in range(300):
+            first, second = engine.rng.sample(population, 2)
+            children = [engine.mutate_individual(child, request.all_drivers) for child in engine.crossover_individuals(first, second)]
+            for child in children:
+                fresh = ScheduleEvaluator(request, list(child['schedule']))
+                self.assertAlmostEqual(child['fitness'], fresh.score())
+                self.assertEqual(child['violations'], fresh.violation_count())
+            population[engine.rng.randrange(len(population))] = children[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
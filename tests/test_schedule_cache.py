@@ -0,0 +1,24 @@
+import tempfile
+import unittest
+from schedule_cache import ScheduleCache
+from schedule_engine import ScheduleRequest, ScheduleResult
+from timeline import make_trip
+
+
+class ExactHitTest(unittest.TestCase):
+    def test_only_complete_results_are_exact_hits(self):
+        request = ScheduleRequest(['a'], ['b'], 2)
+        partial = ScheduleResult(schedule=[make_trip('a', "до конечной", 0, 60, 1)], title="Лучшее найденное расписание:")
+        complete = ScheduleResult(schedule=[make_trip('a', "до конечной", 0, 60, 1), make_trip('b', "до конечной", 0, 60, 1)], title="Итоговое расписание:")
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ScheduleCache(directory=directory)
+            cache.put(request, 'genetic', partial)
+            self.assertIsNone(cache.get(request, 'genetic'))
+            self.assertEqual(cache.nearest(request), partial.schedule)
+            self.assertIsNone(ScheduleCache(directory=directory).get(request, 'genetic'))
+            cache.put(request, 'genetic', complete)
+            self.assertEqual(ScheduleCache(directory=directory).get(request, 'genetic').schedule, complete.schedule)
+
+
+if __name__ == "__main__":
+    unittest.main()
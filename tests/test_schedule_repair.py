@@ -0,0 +1,57 @@
+import random
+import unittest
+from fitness import ScheduleEvaluator
+from schedule_engine import ScheduleEngine, ScheduleRequest
+from schedule_repair import ScheduleDelta, ScheduleRepair
+
+
+def random_delta(rng, request, schedule):
+    trip_ids = list(range(len(schedule)))
+    removed_trips = rng.sample(trip_ids, 2) + [len(schedule) + 50]
+    delayed_trips = [(trip_id, rng.choice((5, 30, 90))) for trip_id in rng.sample(trip_ids, 3)]
+    delayed_trips.append((removed_trips[0], 10))
+    return ScheduleDelta(
+        added_drivers=[("новый", rng.choice("AB"))],
+        removed_drivers=[rng.choice(request.all_drivers)],
+        added_trips=[(rng.choice(request.route_options), rng.randrange(0, 900)) for _ in range(2)],
+        removed_trips=removed_trips,
+        delayed_trips=delayed_trips
+    )
+
+
+class RepairTest(unittest.TestCase):
+    def test_deltas_match_full_evaluation(self):
+        rng = random.Random(13)
+        for seed in range(40):
+            request = ScheduleRequest([f"a{index}" for index in range(3)], [f"b{index}" for index in range(3)], rng.randint(6, 20), selected_day=rng.choice(("Понедельник", "Суббота")))
+            schedule = ScheduleEngine(request, random.Random(seed)).build_optimized_timetable().schedule
+            delta = random_delta(rng, request, schedule)
+            repair = ScheduleRepair(request, schedule)
+            result = repair.apply(delta)
+            fresh = ScheduleEvaluator(repair.request, result.schedule)
+            self.assertAlmostEqual(result.fitness, fresh.score())
+            self.assertEqual(result.violations, fresh.violation_count())
+            self.assertEqual(repair.request.num_routes, len(result.schedule) + len(repair.unassigned))
+            touched = set(delta.removed_trips) | {trip_id for trip_id, minutes in delta.delayed_trips}
+            for trip_id, trip in enumerate(schedule):
+                if trip_id in touched or trip.driver in delta.removed_drivers:
+                    continue
+                repaired = repair.trips[trip_id]
+                self.assertEqual((repaired.driver, repaired.start, repaired.end), (trip.driver, trip.start, trip.end))
+
+    def test_unknown_trip_ids_leave_demand_alone(self):
+        request = ScheduleRequest(['a'], ['b'], 4)
+        schedule = ScheduleEngine(request, random.Random(1)).build_optimized_timetable().schedule
+        repair = ScheduleRepair(request, schedule)
+        self.assertFalse(repair.remove_trip(len(schedule)))
+        self.assertTrue(repair.remove_trip(0))
+        self.assertFalse(repair.remove_trip(0))
+        repair.delay_trip(0, 15)
+        self.assertEqual(repair.request.num_routes, len(schedule) - 1)
+        result = repair.result()
+        self.assertEqual(len(result.schedule), len(schedule) - 1)
+        self.assertAlmostEqual(result.fitness, ScheduleEvaluator(repair.request, result.schedule).score())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+import bisect
+import sys
+from array import array
+
+SERVICE_START_CLOCK = 6 * 60
+SERVICE_END = 21 * 60
+MINUTES_PER_DAY = 24 * 60
+
+SCHEDULE_COLUMNS = ['Водитель', 'Тип маршрута', 'Время начала', 'Время окончания', 'Маршрутов за смену']
+DAY_COLUMN = 'День'
+
+
+def clock_to_minutes(clock):
+    hours, minutes = clock.split(":")
+    offset = int(hours) * 60 + int(minutes) - SERVICE_START_CLOCK
+    if offset < 0:
+        offset += MINUTES_PER_DAY
+    return offset
+
+
+def minutes_to_clock(minute):
+    total = (minute + SERVICE_START_CLOCK) % MINUTES_PER_DAY
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+TRIP_FIELDS = ('driver', 'route_type', 'start', 'end', 'route_number', 'day')
+
+
+class Trip:
+    __slots__ = TRIP_FIELDS
+
+    def __init__(self, driver, route_type, start, end, route_number, day=None):
+        self.driver = driver
+        self.route_type = route_type
+        self.start = start
+        self.end = end
+        self.route_number = route_number
+        self.day = day
+
+    def values(self):
+        return (self.driver, self.route_type, self.start, self.end, self.route_number, self.day)
+
+    def replace(self, **changes):
+        trip = Trip(*self.values())
+        for name, value in changes.items():
+            setattr(trip, name, value)
+        return trip
+
+    def as_dict(self):
+        data = dict(zip(TRIP_FIELDS, self.values()))
+        if self.day is None:
+            del data['day']
+        return data
+
+    def __eq__(self, other):
+        return isinstance(other, Trip) and self.values() == other.values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Trip{self.values()!r}"
+
+
+def make_trip(driver, route_type, start, end, route_number, day=None):
+    return Trip(driver, sys.intern(route_type), start, end, route_number, day)
+
+
+def trip_from_dict(data):
+    day = data.get('day')
+    return Trip(sys.intern(data['driver']), sys.intern(data['route_type']), data['start'], data['end'], data['route_number'], day and sys.intern(day))
+
+
+def encode(values, ids, value):
+    code = ids.get(value)
+    if code is None:
+        code = ids[value] = len(values)
+        values.append(sys.intern(value))
+    return code
+
+
+class TripCodes:
+    def __init__(self, drivers=(), route_types=()):
+        self.drivers = []
+        self.driver_ids = {}
+        self.route_types = []
+        self.route_type_ids = {}
+        for driver in drivers:
+            self.driver_id(driver)
+        for route_type in route_types:
+            self.route_type_id(route_type)
+
+    def driver_id(self, driver):
+        return encode(self.drivers, self.driver_ids, driver)
+
+    def route_type_id(self, route_type):
+        return encode(self.route_types, self.route_type_ids, route_type)
+
+
+class TripArray:
+    __slots__ = ('codes', 'drivers', 'route_types', 'starts', 'ends')
+
+    def __init__(self, codes, drivers=None, route_types=None, starts=None, ends=None):
+        self.codes = codes
+        self.drivers = array('i') if drivers is None else drivers
+        self.route_types = array('H') if route_types is None else route_types
+        self.starts = array('i') if starts is None else starts
+        self.ends = array('i') if ends is None else ends
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def __getitem__(self, index):
+        return TripArray(self.codes, self.drivers[index], self.route_types[index], self.starts[index], self.ends[index])
+
+    def __add__(self, other):
+        return TripArray(self.codes, self.drivers + other.drivers, self.route_types + other.route_types, self.starts + other.starts, self.ends + other.ends)
+
+    def __iter__(self):
+        return iter(self.trips())
+
+    def append(self, trip):
+        self.drivers.append(self.codes.driver_id(trip.driver))
+        self.route_types.append(self.codes.route_type_id(trip.route_type))
+        self.starts.append(trip.start)
+        self.ends.append(trip.end)
+
+    def interval(self, index):
+        if index >= len(self.drivers):
+            return None
+        return self.drivers[index], self.starts[index], self.ends[index]
+
+    def intervals(self):
+        return zip(self.drivers, self.starts, self.ends)
+
+    def replaced(self, index, driver_id, start, end):
+        genome = TripArray(self.codes, self.drivers, self.route_types, self.starts, self.ends)
+        if driver_id != self.drivers[index]:
+            genome.drivers = self.drivers[:]
+            genome.drivers[index] = driver_id
+        if start != self.starts[index] or end != self.ends[index]:
+            genome.starts = self.starts[:]
+            genome.ends = self.ends[:]
+            genome.starts[index] = start
+            genome.ends[index] = end
+        return genome
+
+    def trips(self):
+        route_counts = {}
+        route_numbers = [0] * len(self.drivers)
+        for index in sorted(range(len(self.drivers)), key=self.starts.__getitem__):
+            driver_id = self.drivers[index]
+            route_counts[driver_id] = route_counts.get(driver_id, 0) + 1
+            route_numbers[index] = route_counts[driver_id]
+        drivers = self.codes.drivers
+        route_types = self.codes.route_types
+        return [
+            Trip(drivers[driver_id], route_types[route_type], start, end, route_number)
+            for driver_id, route_type, start, end, route_number in zip(self.drivers, self.route_types, self.starts, self.ends, route_numbers)
+        ]
+
+
+class DriverTimeline:
+    __slots__ = ('starts', 'ends', 'worked_minutes')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.worked_minutes = 0
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def last_end(self):
+        return self.ends[-1] if self.ends else None
+
+    def overlaps(self, start, end):
+        index = bisect.bisect_left(self.starts, end)
+        return index > 0 and self.ends[index - 1] > start
+
+    def fits(self, start, end, min_break=0):
+        index = bisect.bisect_right(self.starts, start)
+        if index > 0 and self.ends[index - 1] + min_break > start:
+            return False
+        if index < len(self.starts) and end + min_break > self.starts[index]:
+            return False
+        return True
+
+    def add(self, start, end):
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.worked_minutes += end - start
+
+    def remove(self, start, end):
+        index = bisect.bisect_left(self.starts, start)
+        while index < len(self.starts) and self.starts[index] == start:
+            if self.ends[index] == end:
+                del self.starts[index]
+                del self.ends[index]
+                self.worked_minutes -= end - start
+                return True
+            index += 1
+        return False
+
+    def free_periods(self, min_length, day_end=SERVICE_END):
+        current = 0
+        for start, end in zip(self.starts, self.ends):
+            if start - current >= min_length:
+                yield current, start
+            current = max(current, end)
+        if day_end - current >= min_length:
+            yield current, day_end
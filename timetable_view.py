@@ -0,0 +1,139 @@
+import ttkbootstrap as tb
+from ttkbootstrap.constants import *
+from tkinter import messagebox
+from tkinter import ttk
+from schedule_table import ScheduleTable
+from timeline import clock_to_minutes
+
+WHEEL_ROWS = 3
+
+
+class VirtualTimetable:
+    def __init__(self, parent, schedule, visible_rows=30):
+        self.table = ScheduleTable(schedule)
+        self.visible_rows = visible_rows
+        self.first_row = 0
+        self.frame = tb.Frame(parent)
+        self.build_filter_bar()
+        body = tb.Frame(self.frame)
+        body.pack(fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree = ttk.Treeview(body, columns=self.table.column_names, show='headings', height=visible_rows, selectmode='none')
+        for col in self.table.column_names:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=150, anchor='center')
+        self.row_ids = [self.tree.insert("", "end", values=()) for _ in range(visible_rows)]
+        self.tree.pack(fill='both', expand=True)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self.on_mouse_wheel)
+        self.tree.bind("<Up>", lambda e: self.scroll_by(-1))
+        self.tree.bind("<Down>", lambda e: self.scroll_by(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self.visible_rows))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.table)))
+        self.count_label = tb.Label(self.frame, text="", font=("Helvetica", 12))
+        self.count_label.pack(pady=(10, 0))
+        self.refresh()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def build_filter_bar(self):
+        bar = tb.Frame(self.frame)
+        bar.pack(fill='x', pady=(0, 10))
+        self.day_filter = None
+        if self.table.day_indices is not None:
+            tb.Label(bar, text="День:", font=("Helvetica", 12)).pack(side=LEFT, padx=5)
+            self.day_filter = tb.Combobox(bar, values=[""] + self.table.day_names_present(), state="readonly", width=14)
+            self.day_filter.pack(side=LEFT, padx=5)
+        tb.Label(bar, text="Водитель:", font=("Helvetica", 12)).pack(side=LEFT, padx=5)
+        self.driver_filter = tb.Entry(bar, width=20)
+        self.driver_filter.pack(side=LEFT, padx=5)
+        self.driver_filter.bind("<Return>", lambda e: self.apply_filter())
+        tb.Label(bar, text="Тип маршрута:", font=("Helvetica", 12)).pack(side=LEFT, padx=5)
+        self.route_type_filter = tb.Combobox(bar, values=[""] + self.table.route_type_names(), state="readonly", width=35)
+        self.route_type_filter.pack(side=LEFT, padx=5)
+        tb.Label(bar, text="Начало с:", font=("Helvetica", 12)).pack(side=LEFT, padx=5)
+        self.time_from_filter = tb.Entry(bar, width=8)
+        self.time_from_filter.pack(side=LEFT, padx=5)
+        tb.Label(bar, text="по:", font=("Helvetica", 12)).pack(side=LEFT, padx=5)
+        self.time_to_filter = tb.Entry(bar, width=8)
+        self.time_to_filter.pack(side=LEFT, padx=5)
+        tb.Button(bar, text="Применить", command=self.apply_filter, bootstyle=INFO).pack(side=LEFT, padx=5)
+        tb.Button(bar, text="Сбросить", command=self.clear_filter, bootstyle=SECONDARY).pack(side=LEFT, padx=5)
+
+    def read_time(self, entry):
+        text = entry.get().strip()
+        if not text:
+            return None
+        return clock_to_minutes(text)
+
+    def apply_filter(self):
+        try:
+            time_from = self.read_time(self.time_from_filter)
+            time_to = self.read_time(self.time_to_filter)
+        except ValueError:
+            messagebox.showerror("Ошибка", "Время нужно указать в формате ЧЧ:ММ.")
+            return
+        self.table.apply_filter(
+            driver=self.driver_filter.get().strip(),
+            route_type=self.route_type_filter.get(),
+            time_from=time_from,
+            time_to=time_to,
+            day=self.day_filter.get() if self.day_filter is not None else None
+        )
+        self.scroll_to(0)
+
+    def clear_filter(self):
+        for entry in (self.driver_filter, self.time_from_filter, self.time_to_filter):
+            entry.delete(0, tb.END)
+        self.route_type_filter.set("")
+        if self.day_filter is not None:
+            self.day_filter.set("")
+        self.table.clear_filter()
+        self.scroll_to(0)
+
+    def sort_by(self, column):
+        self.table.sort(column)
+        for col in self.table.column_names:
+            arrow = (" ▼" if self.table.sort_descending else " ▲") if col == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.scroll_to(0)
+
+    def scroll_to(self, first_row):
+        last_first_row = max(0, len(self.table) - self.visible_rows)
+        self.first_row = min(max(0, first_row), last_first_row)
+        self.refresh()
+        return "break"
+
+    def scroll_by(self, rows):
+        return self.scroll_to(self.first_row + rows)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.table)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            return self.scroll_by(-WHEEL_ROWS)
+        return self.scroll_by(WHEEL_ROWS)
+
+    def refresh(self):
+        rows = self.table.rows(self.first_row, self.visible_rows)
+        for row_id, values in zip(self.row_ids, rows):
+            self.tree.item(row_id, values=values)
+        for row_id in self.row_ids[len(rows):]:
+            self.tree.item(row_id, values=())
+        total = len(self.table)
+        if total:
+            self.scrollbar.set(self.first_row / total, (self.first_row + len(rows)) / total)
+            shown = f"{self.first_row + 1}–{self.first_row + len(rows)}"
+        else:
+            self.scrollbar.set(0, 1)
+            shown = "0"
+        self.count_label.config(text=f"Строки {shown} из {total} (всего рейсов: {self.table.total_rows()})")
@@ -0,0 +1,176 @@
+import multiprocessing
+import os
+import random
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import replace
+from dispatcher import HeapDispatcher
+from schedule_engine import DAYS, ScheduleEngine, ScheduleResult, is_weekend
+
+WEEKLY_HOURS_A = 40
+WEEKLY_HOURS_B = 48
+WEEK_ENGINES = ('fast', 'direct', 'genetic')
+CANCEL_POLL = 0.1
+
+_day_cancel_event = None
+
+
+def init_day_worker(cancel_event):
+    global _day_cancel_event
+    _day_cancel_event = cancel_event
+
+
+def working_days(drivers, days, shift_duration, weekly_hours):
+    days_per_driver = min(len(days), weekly_hours // shift_duration)
+    rota = {day: [] for day in days}
+    if not days_per_driver:
+        return rota
+    for index, driver in enumerate(drivers):
+        for offset in range(days_per_driver):
+            rota[days[(index * days_per_driver + offset) % len(days)]].append(driver)
+    return rota
+
+
+def build_rota(request, weekly_hours_a=WEEKLY_HOURS_A, weekly_hours_b=WEEKLY_HOURS_B):
+    weekdays = [day for day in DAYS if not is_weekend(day)]
+    rota_a = working_days(request.type_a_drivers, weekdays, request.shift_duration_a, weekly_hours_a)
+    rota_b = working_days(request.type_b_drivers, DAYS, request.shift_duration_b, weekly_hours_b)
+    return {day: (rota_a.get(day, []), rota_b[day]) for day in DAYS}
+
+
+def schedule_day(request, engine_name, seed, cancel_event=None, generations=50, population_size=20, mutation_rate=0.1):
+    if engine_name == 'fast':
+        return HeapDispatcher(request, cancel_event=cancel_event).run()
+    engine = ScheduleEngine(request, random.Random(seed), cancel_event=cancel_event)
+    if engine_name == 'genetic':
+        return engine.execute_genetic_algorithm(generations=generations, population_size=population_size, mutation_rate=mutation_rate)
+    return engine.build_optimized_timetable()
+
+
+def schedule_pool_day(request, engine_name, seed, **options):
+    return schedule_day(request, engine_name, seed, _day_cancel_event, **options)
+
+
+class WeekScheduler:
+    def __init__(self, request, engine_name='fast', workers=None, seed=None, weekly_hours_a=WEEKLY_HOURS_A, weekly_hours_b=WEEKLY_HOURS_B, progress=None, cancel_event=None, stats=None):
+        self.request = request
+        self.engine_name = engine_name
+        self.workers = workers if workers is not None else min(len(DAYS), os.cpu_count() or 1)
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.weekly_limits = {}
+        for driver in request.type_a_drivers:
+            self.weekly_limits[driver] = weekly_hours_a * 60
+        for driver in request.type_b_drivers:
+            self.weekly_limits[driver] = weekly_hours_b * 60
+        self.rota = build_rota(request, weekly_hours_a, weekly_hours_b)
+        self.engine = ScheduleEngine(request, progress=progress, cancel_event=cancel_event, stats=stats)
+        self.options = {}
+
+    def day_request(self, day, type_a_drivers, type_b_drivers):
+        return replace(self.request, type_a_drivers=list(type_a_drivers), type_b_drivers=list(type_b_drivers), selected_day=day)
+
+    def day_seed(self, day):
+        return self.seed + DAYS.index(day)
+
+    def run_days(self, day_requests):
+        results = {}
+        engine = self.engine
+        if self.workers <= 1 or len(day_requests) == 1:
+            for day, day_request in day_requests.items():
+                if engine.is_cancelled():
+                    break
+                result = schedule_day(day_request, self.engine_name, self.day_seed(day), engine.cancel_event, **self.options)
+                if result.cancelled:
+                    break
+                results[day] = result
+                engine.report_progress(len(results), len(DAYS))
+            return results
+        stop_event = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_day_worker, initargs=(stop_event,)) as pool:
+            futures = {
+                pool.submit(schedule_pool_day, day_request, self.engine_name, self.day_seed(day), **self.options): day
+                for day, day_request in day_requests.items()
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=CANCEL_POLL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if not result.cancelled:
+                        results[futures[future]] = result
+                engine.report_progress(len(results), len(DAYS))
+                if engine.is_cancelled():
+                    stop_event.set()
+                    for future in pending:
+                        future.cancel()
+                    break
+        return results
+
+    def worked_minutes(self, results):
+        worked = Counter()
+        for result in results.values():
+            for trip in result.schedule:
+                worked[trip.driver] += trip.end - trip.start
+        return worked
+
+    def reserve_drivers(self, day, day_request, worked):
+        request = self.request
+        rostered = set(day_request.all_drivers)
+        reserve_a = []
+        if not is_weekend(day):
+            reserve_a = [driver for driver in request.type_a_drivers if driver not in rostered and self.weekly_limits[driver] - worked[driver] >= request.shift_duration_a * 60]
+        reserve_b = [driver for driver in request.type_b_drivers if driver not in rostered and self.weekly_limits[driver] - worked[driver] >= request.shift_duration_b * 60]
+        return reserve_a, reserve_b
+
+    def run(self, **options):
+        self.options = options
+        engine = self.engine
+        day_requests = {day: self.day_request(day, *self.rota[day]) for day in DAYS}
+        results = self.run_days(day_requests)
+        worked = self.worked_minutes(results)
+        for day in DAYS:
+            result = results.get(day)
+            if result is None or result.ok or engine.is_cancelled():
+                continue
+            reserve_a, reserve_b = self.reserve_drivers(day, day_requests[day], worked)
+            if not reserve_a and not reserve_b:
+                continue
+            if engine.stats is not None:
+                engine.stats.count('week.retried_days')
+            day_request = day_requests[day]
+            day_requests[day] = self.day_request(day, day_request.type_a_drivers + reserve_a, day_request.type_b_drivers + reserve_b)
+            retry = schedule_day(day_requests[day], self.engine_name, self.day_seed(day), engine.cancel_event, **options)
+            if retry.ok:
+                for trip in result.schedule:
+                    worked[trip.driver] -= trip.end - trip.start
+                for trip in retry.schedule:
+                    worked[trip.driver] += trip.end - trip.start
+                results[day] = retry
+        return self.week_result(results)
+
+    def week_result(self, results):
+        schedule = []
+        failures = []
+        fitness = 0
+        violations = 0
+        for day in DAYS:
+            result = results.get(day)
+            if result is None:
+                continue
+            schedule.extend(trip.replace(day=day) for trip in result.schedule)
+            fitness += result.fitness
+            violations += result.violations
+            if result.failure:
+                failures.append(f"{day}: {result.failure.splitlines()[0]}")
+        cancelled = self.engine.is_cancelled() and len(results) < len(DAYS)
+        if failures:
+            message = "Неделя спланирована не полностью.\n" + "\n".join(failures) + "\nНужно добавить водителей или уменьшить число рейсов."
+            return ScheduleResult(schedule=schedule, failure=message, fitness=fitness, violations=violations, cancelled=cancelled)
+        if cancelled:
+            title = f"Формирование недели отменено. Готово дней: {len(results)}:"
+        else:
+            details = f"{len(schedule)} из {len(DAYS) * self.request.num_routes} рейсов"
+            if violations:
+                details += f", нарушений: {violations}"
+            title = f"Расписание на неделю ({details}):"
+        return ScheduleResult(schedule=schedule, title=title, fitness=fitness, violations=violations, cancelled=cancelled)